@@ -35,27 +35,45 @@ __author__ = 'Wim Lavrijsen <WLavrijsen@lbl.gov>'
 
 __all__ = [
     'cppdef',                 # declare C++ source to Cling
+    'cppdef_many',            # declare many C++ sources in one transaction
     'cppexec',                # execute a C++ statement
     'macro',                  # attempt to evaluate a cpp macro
+    'macros',                 # evaluate many cpp macros in one go
+    'import_macros',          # evaluate the cpp macros defined in a header
     'include',                # load and jit a header file
     'c_include',              # load and jit a C header file
     'load_library',           # load a shared library
     'nullptr',                # unique pointer representing NULL
     'sizeof',                 # size of a C++ type
+    'alignof',                # alignment of a C++ type
+    'offsetof',               # offset of a data member in a C++ class
     'typeid',                 # typeid of a C++ type
+    'set_type_cache_size',    # bound the sizeof/alignof/offsetof/typeid caches
     'multi',                  # helper for multiple inheritance
+    'prewarm',                # resolve C++ entities ahead of use
+    'vectorize',              # apply a C++ function elementwise to arrays
+    'parallel_map',           # call a C++ function over many arguments in parallel
     'add_include_path',       # add a path to search for headers
     'add_library_path',       # add a path to search for headers
     'add_autoload_map',       # explicitly include an autoload map
     'set_debug',              # enable/disable debug output
+    'set_cache_dir',          # enable/disable the persistent cppdef/include cache
+    'cache_stats',            # hits/misses of the persistent cppdef/include cache
+    'startup_profile',        # per-phase timings of 'import cppyy'
     ]
 
+import bisect
 import ctypes
+import itertools
 import os
+import re
 import sys
 import sysconfig
 import warnings
 
+from . import _startup
+from ._startup import startup_profile
+
 if not 'CLING_STANDARD_PCH' in os.environ:
     def _set_pch():
         try:
@@ -69,6 +87,7 @@ if not 'CLING_STANDARD_PCH' in os.environ:
             pass
     _set_pch()
     del _set_pch
+_startup.mark('pch')
 
 try:
     import __pypy__
@@ -77,7 +96,9 @@ try:
 except ImportError:
     ispypy = False
 
-from . import _typemap
+from . import _cppcache, _typecache, _typemap
+from ._cppcache import set_cache_dir, cache_stats
+from ._parallel import parallel_map
 from ._version import __version__
 
 # import separately instead of in the above try/except block for easier to
@@ -86,6 +107,13 @@ if ispypy:
     from ._pypy_cppyy import *
 else:
     from ._cpython_cppyy import *
+    from ._trampoline import compile_call
+    __all__ += [
+        'save_template_manifest', # record class template instantiations to file
+        'load_template_manifest', # replay recorded class template instantiations
+        'compile_call',           # JIT a call trampoline for a fixed signature
+        ]
+_startup.mark('backend_exports')
 
 
 #- allow importing from gbl --------------------------------------------------
@@ -96,59 +124,177 @@ sys.modules['cppyy.gbl.std'] = gbl.std
 #- enable auto-loading -------------------------------------------------------
 try:    gbl.gInterpreter.EnableAutoLoading()
 except: pass
+_startup.mark('autoloading')
 
 
 #- external typemap ----------------------------------------------------------
 _typemap.initialize(_backend)               # also creates (u)int8_t mapper
+_startup.mark('typemap')
+
+
+#- lazy setup of std ---------------------------------------------------------
+class _lazy_std_attr(object):
+  # placed on the meta class of std, this descriptor is only reached if the
+  # attribute is not yet in std's dictionary; on first access, it removes itself
+  # (re-enabling normal C++ lookup for use by <factory>) and installs the result
+    __slots__ = ['name', 'factory']
+    def __init__(self, name, factory):
+        self.name    = name
+        self.factory = factory
+    def __get__(self, std, meta=None):
+        if std is None:
+            return self
+        delattr(type(std), self.name)
+        value = self.factory(std)
+        setattr(std, self.name, value)
+        return value
+
+def _lazy_std(name, factory):
+    if ispypy:      # meta classes need not be unique per scope
+        setattr(gbl.std, name, factory(gbl.std))
+    else:
+        setattr(type(gbl.std), name, _lazy_std_attr(name, factory))
 
-try:
-    gbl.std.int8_t  = gbl.int8_t            # ensures same _integer_ type
-    gbl.std.uint8_t = gbl.uint8_t
-except (AttributeError, TypeError):
-    pass
+# ensures same _integer_ type
+_lazy_std('int8_t',  lambda std: gbl.int8_t)
+_lazy_std('uint8_t', lambda std: gbl.uint8_t)
 
 
 #- pythonization factories ---------------------------------------------------
 from . import _pythonization as py
 py._set_backend(_backend)
 
-def _standard_pythonizations(pyclass, name):
-  # pythonization of tuple; TODO: placed here for convenience, but a custom case
-  # for tuples on each platform can be made much more performant ...
-    if name.find('tuple<', 0, 6) == 0:
-        import cppyy
-        pyclass._tuple_len = cppyy.gbl.std.tuple_size(pyclass).value
-        def tuple_len(self):
-            return self.__class__._tuple_len
-        pyclass.__len__ = tuple_len
-        def tuple_getitem(self, idx, get=cppyy.gbl.std.get):
-            if idx < self.__class__._tuple_len:
-                res = get[idx](self)
-                try:
-                    res.__life_line = self
-                except Exception:
-                    pass
-                return res
-            raise IndexError(idx)
-        pyclass.__getitem__ = tuple_getitem
-
-  # pythonization of std::string; placed here because it's simpler to write the
-  # custom "npos" object (to allow easy result checking of find/rfind) in Python
-    elif pyclass.__cpp_name__ == "std::string":
-        class NPOS(0x3000000 <= sys.hexversion and int or long):
-            def __eq__(self, other):
-                return other == -1 or  int(self) == other
-            def __ne__(self, other):
-                return other != -1 and int(self) != other
-        del pyclass.__class__.npos          # drop b/c is const data
-        pyclass.npos = NPOS(pyclass.npos)
+# pythonization of tuple: the element offsets are calculated once per tuple
+# class, after which builtin types are read directly from memory; all other
+# types (classes, pointers, etc.) go through std::get<>, as before, so that
+# their return types are unchanged
+_tuple_ctypes = {
+    'bool'               : ctypes.c_bool,
+    'short'              : ctypes.c_short,
+    'unsigned short'     : ctypes.c_ushort,
+    'int'                : ctypes.c_int,
+    'unsigned int'       : ctypes.c_uint,
+    'long'               : ctypes.c_long,
+    'unsigned long'      : ctypes.c_ulong,
+    'long long'          : ctypes.c_longlong,
+    'unsigned long long' : ctypes.c_ulonglong,
+    'int8_t'             : ctypes.c_int8,
+    'uint8_t'            : ctypes.c_uint8,
+    'int16_t'            : ctypes.c_int16,
+    'uint16_t'           : ctypes.c_uint16,
+    'int32_t'            : ctypes.c_int32,
+    'uint32_t'           : ctypes.c_uint32,
+    'int64_t'            : ctypes.c_int64,
+    'uint64_t'           : ctypes.c_uint64,
+    'size_t'             : ctypes.c_size_t,
+    'float'              : ctypes.c_float,
+    'double'             : ctypes.c_double,
+    }
+
+def _split_template_args(name):
+    """Split the template arguments of C++ class <name> at the top level."""
+    args, depth, start = [], 0, name.find('<')+1
+    for i in range(start, len(name)):
+        c = name[i]
+        if c in '<(':
+            depth += 1
+        elif c in '>)':
+            depth -= 1
+            if depth < 0:
+                args.append(name[start:i].strip())
+                break
+        elif c == ',' and depth == 0:
+            args.append(name[start:i].strip())
+            start = i+1
+    return [arg for arg in args if arg]
+
+def _tuple_getter(pyclass, idx, cpptype):
+    ctype = _tuple_ctypes.get(cpptype)
+    if ctype is not None:
+        try:
+            offset = gbl.__cppyy_internal.tuple_offset[pyclass, idx]()
+        except Exception as e:
+            warnings.warn('no direct access to element %d of %s (%s); using std::get<>' %\
+                          (idx, pyclass.__cpp_name__, str(e)), RuntimeWarning)
+            ctype = None
+
+    if ctype is not None:
+        def getter(self, ctype=ctype, offset=offset):
+            return ctype.from_address(addressof(self)+offset).value
+    else:
+        def getter(self, get=gbl.std.get[idx]):
+            res = get(self)
+            try:
+                res.__life_line = self
+            except Exception:
+                pass
+            return res
+    return getter
+
+_tuple_helpers_declared = False
+def _pythonize_tuple(pyclass, name):
+    global _tuple_helpers_declared
+    if not _tuple_helpers_declared:
+        _cppdef("""namespace __cppyy_internal {
+template<typename T, size_t I>
+ptrdiff_t tuple_offset() {
+    alignas(T) char buf[sizeof(T)];
+    return (char*)&std::get<I>(*(T*)buf) - buf;
+} }""")
+        _tuple_helpers_declared = True
+
+    pyclass._tuple_len = gbl.std.tuple_size(pyclass).value
+    cpptypes = _split_template_args(pyclass.__cpp_name__)
+    if len(cpptypes) != pyclass._tuple_len:
+        cpptypes = [''] * pyclass._tuple_len        # unknown, use std::get<>
+    pyclass._tuple_getters = tuple(
+        _tuple_getter(pyclass, idx, cpptype) for idx, cpptype in enumerate(cpptypes))
+
+    def tuple_len(self):
+        return self.__class__._tuple_len
+    pyclass.__len__ = tuple_len
+    def tuple_getitem(self, idx):
+        if idx < self.__class__._tuple_len:
+            return self.__class__._tuple_getters[idx](self)
+        raise IndexError(idx)
+    pyclass.__getitem__ = tuple_getitem
+    def tuple_iter(self):
+        for getter in self.__class__._tuple_getters:
+            yield getter(self)
+    pyclass.__iter__ = tuple_iter
+
+# pythonization of std::string; placed here because it's simpler to write the
+# custom "npos" object (to allow easy result checking of find/rfind) in Python
+def _pythonize_string(pyclass, name):
+    if pyclass.__cpp_name__ != "std::string":
+        return
+    class NPOS(0x3000000 <= sys.hexversion and int or long):
+        def __eq__(self, other):
+            return other == -1 or  int(self) == other
+        def __ne__(self, other):
+            return other != -1 and int(self) != other
+    del pyclass.__class__.npos          # drop b/c is const data
+    pyclass.npos = NPOS(pyclass.npos)
+
+# dispatch on the (template) base name, so that the pythonizors only run for
+# the classes they apply to
+_std_pythonizors = {
+    'tuple'        : _pythonize_tuple,
+    'string'       : _pythonize_string,
+    'basic_string' : _pythonize_string,
+    }
 
+def _standard_pythonizations(pyclass, name):
+    pythonizor = _std_pythonizors.get(name.partition('<')[0])
+    if pythonizor is not None:
+        pythonizor(pyclass, name)
     return True
 
 if not ispypy:
     py.add_pythonization(_standard_pythonizations, "std")
 # TODO: PyPy still has the old-style pythonizations, which require the full
 # class name (not possible for std::tuple ...)
+_startup.mark('pythonizations')
 
 # std::make_shared/unique create needless templates: rely on Python's introspection
 # instead. This also allows Python derived classes to be handled correctly.
@@ -181,9 +327,10 @@ class make_smartptr(object):
             return py_make_smartptr(getattr(gbl, cls), self.ptrcls)
         return self.maker[cls]
 
-gbl.std.make_shared = make_smartptr(gbl.std.shared_ptr, gbl.std.make_shared)
-gbl.std.make_unique = make_smartptr(gbl.std.unique_ptr, gbl.std.make_unique)
+_lazy_std('make_shared', lambda std, mk=make_smartptr: mk(std.shared_ptr, std.make_shared))
+_lazy_std('make_unique', lambda std, mk=make_smartptr: mk(std.unique_ptr, std.make_unique))
 del make_smartptr
+_startup.mark('make_smartptr')
 
 
 #--- interface to Cling ------------------------------------------------------
@@ -216,15 +363,62 @@ def _cling_report(msg, errcode, msg_is_error=False):
     if errcode or (msg and msg_is_error):
         raise SyntaxError('Failed to parse the given C++ code%s' % msg)
 
+# evaluated macro's, valid for the current set of declarations only, as any new
+# declaration may (re)define macro's
+_macro_values = dict()
+
+def _cppdef(src):
+  # declare without going through the persistent cache: for cppyy's own helpers,
+  # which must be fully declared in every process
+    _macro_values.clear()
+    with _stderr_capture() as err:
+        errcode = gbl.gInterpreter.Declare(src)
+    _cling_report(err.err, int(not errcode), msg_is_error=True)
+    return True
+
 def cppdef(src):
     """Declare C++ source <src> to Cling."""
+    _macro_values.clear()
+    hit, key = _cppcache.lookup('cppdef', src)
+    if hit:
+        return True
+    _cppdef(src)
+    _cppcache.store(key, 'cppdef', src)
+    return True
+
+_input_line_re = re.compile(r'input_line_\d+:(\d+):\d+:')
+def cppdef_many(srcs):
+    """Declare all C++ sources in <srcs> to Cling in a single transaction.
+
+    If any source fails to parse, none are declared and the error messages
+    refer to the offending source by its index in <srcs>.
+    """
+    _macro_values.clear()
+    srcs = list(srcs)
+    src = '\n'.join(srcs)
+    hit, key = _cppcache.lookup('cppdef', src)
+    if hit:
+        return True
     with _stderr_capture() as err:
         errcode = gbl.gInterpreter.Declare(src)
-    _cling_report(err.err, int(not errcode), msg_is_error=True)
+    msg = err.err
+    if msg:
+      # map the line numbers in Cling's diagnostics back to the individual sources
+        firsts = [1]
+        for s in srcs[:-1]:
+            firsts.append(firsts[-1]+s.count('\n')+1)
+        def locate(m):
+            lineno = int(m.group(1))
+            idx = bisect.bisect_right(firsts, lineno)-1
+            return '%s (source %d, line %d):' % (m.group(0)[:-1], idx, lineno-firsts[idx]+1)
+        msg = _input_line_re.sub(locate, msg)
+    _cling_report(msg, int(not errcode), msg_is_error=True)
+    _cppcache.store(key, 'cppdef', src)
     return True
 
 def cppexec(stmt):
     """Execute C++ statement <stmt> in Cling's global scope."""
+    _macro_values.clear()
     if stmt and stmt[-1] != ';':
         stmt += ';'
 
@@ -249,15 +443,74 @@ def macro(cppm):
     """Attempt to evalute a C/C++ pre-processor macro as a constant"""
 
     try:
-        macro_val = getattr(getattr(gbl, '__cppyy_macros', None), cppm+'_', None)
-        if macro_val is None:
-            cppdef("namespace __cppyy_macros { auto %s_ = %s; }" % (cppm, cppm))
-        return getattr(getattr(gbl, '__cppyy_macros'), cppm+'_')
-    except Exception:
+        return macros([cppm])[cppm]
+    except KeyError:
         pass
 
     raise ValueError('Failed to evaluate macro %s', cppm)
 
+_macro_count = itertools.count()
+def _eval_macros(names):
+    nsname = '_%d' % next(_macro_count)
+    src = ['namespace __cppyy_macros { namespace %s {' % nsname]
+    for name in names:
+        src.append('#ifdef %s\nauto %s_ = %s;\n#endif' % (name, name, name))
+    src.append('} }')
+    with _stderr_capture():
+        errcode = gbl.gInterpreter.Declare('\n'.join(src))
+    if not errcode:
+      # at least one macro does not represent a constant: bisect to find it
+        if len(names) == 1:
+            return {}
+        half = len(names)//2
+        values = _eval_macros(names[:half])
+        values.update(_eval_macros(names[half:]))
+        return values
+
+    ns = getattr(getattr(gbl, '__cppyy_macros'), nsname)
+    values = dict()
+    for name in names:
+        try:
+            values[name] = getattr(ns, name+'_')
+        except AttributeError:
+            pass            # not defined
+    return values
+
+_no_macro = object()
+def macros(names):
+    """Evaluate the C/C++ pre-processor macros <names> as constants, using a
+    single declaration; returns a dictionary of name -> value for all macros
+    that could be evaluated.
+    """
+    names = list(names)
+    todo = [name for name in dict.fromkeys(names) if not name in _macro_values]
+    if todo:
+        values = _eval_macros(todo)
+        for name in todo:
+            _macro_values[name] = values.get(name, _no_macro)
+    values = dict()
+    for name in names:
+        val = _macro_values[name]
+        if val is not _no_macro:
+            values[name] = val
+    return values
+
+_define_re = re.compile(r'^\s*#\s*define\s+([A-Za-z_]\w*)[ \t]+(?=\S)', re.MULTILINE)
+def import_macros(header, pattern=None):
+    """Include <header> and evaluate all non-empty, object-like macro's that
+    it defines (only those that match regular expression <pattern>, if given)
+    as constants; returns a dictionary of name -> value.
+    """
+    include(header)
+    fname = _cppcache._locate_header(header)
+    if fname is None:
+        raise ImportError('Failed to locate header file "%s"' % header)
+    with open(fname, errors='replace') as f:     # e.g. Latin-1 comments
+        names = _define_re.findall(f.read())
+    if pattern is not None:
+        pattern = re.compile(pattern)
+        names = [name for name in names if pattern.match(name)]
+    return macros(names)
 
 def load_library(name):
     """Explicitly load a shared library."""
@@ -276,22 +529,38 @@ def load_library(name):
         raise RuntimeError('Unable to load library "%s"%s' % (name, err.err))
     return True
 
-def include(header):
-    """Load (and JIT) header file <header> into Cling."""
+def _include(header):
+  # include without going through the persistent cache (see _cppdef)
+    _macro_values.clear()
     with _stderr_capture() as err:
         errcode = gbl.gInterpreter.Declare('#include "%s"' % header)
     if not errcode:
         raise ImportError('Failed to load header file "%s"%s' % (header, err.err))
     return True
 
+def include(header):
+    """Load (and JIT) header file <header> into Cling."""
+    _macro_values.clear()
+    hit, key = _cppcache.lookup('include', header)
+    if hit:
+        return True
+    _include(header)
+    _cppcache.store(key, 'include', header)
+    return True
+
 def c_include(header):
     """Load (and JIT) header file <header> into Cling."""
+    _macro_values.clear()
+    hit, key = _cppcache.lookup('c_include', header)
+    if hit:
+        return True
     with _stderr_capture() as err:
         errcode = gbl.gInterpreter.Declare("""extern "C" {
 #include "%s"
 }""" % header)
     if not errcode:
         raise ImportError('Failed to load header file "%s"%s' % (header, err.err))
+    _cppcache.store(key, 'c_include', header)
     return True
 
 def add_include_path(path):
@@ -315,15 +584,47 @@ elif ispypy:
     apipath = os.path.dirname(apipath)
     if os.path.exists(apipath) and os.path.exists(os.path.join(apipath, 'Python.h')):
         add_include_path(apipath)
+_startup.mark('python_include_path')
 
 # add access to extra headers for dispatcher (CPyCppyy only (?))
 if not ispypy:
+  # the result of the search for the API headers below is cached next to the PCH,
+  # keyed on the interpreter and package versions, as walking the installation
+  # metadata is expensive
+    def _api_cache():
+        pch = os.environ.get('CLING_STANDARD_PCH', '')
+        cache_dir = pch and os.path.dirname(pch) or os.path.dirname(__file__)
+        key = ' '.join([sys.executable, hex(sys.hexversion), __version__, _backend.__file__,
+                        str(int(os.stat(_backend.__file__).st_mtime))])
+        return os.path.join(cache_dir, 'CPyCppyy_API.path'), key
+
+    def _read_api_cache(cache):
+        try:
+            fname, key = cache
+            with open(fname) as f:
+                cached_key, path = f.read().split('\n')[:2]
+            if cached_key == key and os.path.exists(os.path.join(path, 'CPyCppyy')):
+                return path
+        except (IOError, OSError, ValueError):
+            pass
+        return None
+
+    def _write_api_cache(cache, path):
+        try:
+            fname, key = cache
+            with open(fname, 'w') as f:
+                f.write('%s\n%s\n' % (key, path))
+        except (IOError, OSError):
+            pass                # e.g. read-only installation
+
     try:
         apipath_extra = os.environ['CPPYY_API_PATH']
         if os.path.basename(apipath_extra) == 'CPyCppyy':
             apipath_extra = os.path.dirname(apipath_extra)
+        api_cached = True
     except KeyError:
-        apipath_extra = None
+        apipath_extra = _read_api_cache(_api_cache())
+        api_cached = apipath_extra is not None
 
     if apipath_extra is None:
         try:
@@ -384,9 +685,12 @@ if not ispypy:
                           "set CPPYY_API_PATH envar to the 'CPyCppyy' API directory to fix"
                           % apipath_extra)
         else:
+            if not api_cached:
+                _write_api_cache(_api_cache(), apipath_extra)
             add_include_path(apipath_extra)
 
-    del apipath_extra
+    del apipath_extra, api_cached
+    _startup.mark('cpycppyy_api_path')
 
 if os.getenv('CONDA_PREFIX'):
   # MacOS, Linux
@@ -407,6 +711,7 @@ if os.path.exists(include_path):
     add_include_path(include_path)
 
 del include_path, apipath, ispypy
+_startup.mark('include_paths')
 
 def add_autoload_map(fname):
     """Add the entries from a autoload (.rootmap) file to Cling."""
@@ -430,36 +735,211 @@ def _get_name(tt):
         ttname = tt.__name__
     return ttname
 
-_sizes = {}
-def sizeof(tt):
-    """Returns the storage size (in chars) of C++ type <tt>."""
+def _size_of_type(name):
+    try:
+        size_of_type = _backend._cpp_backend.cppyy_size_of_type
+    except AttributeError:
+        return 0
+    if size_of_type.restype is not ctypes.c_size_t:
+        size_of_type.argtypes = [ctypes.c_char_p]
+        size_of_type.restype  = ctypes.c_size_t
+    return size_of_type(name.encode('utf-8'))
+
+def _resolve_sizeof(tt):
+    try:
+        return ctypes.sizeof(tt)
+    except TypeError:
+        pass
+    name = _get_name(tt)
+  # the reflection layer answers without JITing code, but knows only about
+  # scopes and builtins (and returns 0 for anything else, e.g. pointers)
+    sz = _size_of_type(name)
+    if not sz:
+        sz = gbl.gInterpreter.ProcessLine("sizeof(%s);" % (name,))
+    return sz
+
+def _as_type(tt):
     if not isinstance(tt, type) and not isinstance(tt, str):
         tt = type(tt)
+    return tt
+
+_sizes = _typecache.TypeInfoCache(_resolve_sizeof)
+def sizeof(tt):
+    """Returns the storage size (in chars) of C++ type <tt>, or a list of sizes
+    if <tt> is a list of types."""
+    if isinstance(tt, (list, tuple)):
+        return [_sizes(_as_type(t)) for t in tt]
+    return _sizes(_as_type(tt))
+
+def _process_line(line):
+  # returns the value of expression <line>, or None on a compilation error
+    errcode = ctypes.c_int(0)
+    with _stderr_capture() as err:
+        value = gbl.gInterpreter.ProcessLine(line, ctypes.pointer(errcode))
+    if errcode.value or 'error' in err.err:
+        return None
+    return value
+
+def _resolve_alignof(tt):
     try:
-        return _sizes[tt]
-    except KeyError:
+        return ctypes.alignment(tt)
+    except TypeError:
+        pass
+  # alignment is not part of the reflection information
+    al = _process_line("alignof(%s);" % (_get_name(tt),))
+    if not al:
+        raise TypeError('unknown type "%s"' % (_get_name(tt),))
+    return al
+
+_alignments = _typecache.TypeInfoCache(_resolve_alignof)
+_alignof_count = itertools.count()
+def alignof(tt):
+    """Returns the alignment (in chars) of C++ type <tt>, or a list of
+    alignments if <tt> is a list of types."""
+    if not isinstance(tt, (list, tuple)):
+        return _alignments(_as_type(tt))
+
+    tts = [_as_type(t) for t in tt]
+    misses = list()
+    for t in tts:
+        if t in _alignments or t in misses:
+            continue
         try:
-            sz = ctypes.sizeof(tt)
+            _alignments.setdefault(t, ctypes.alignment(t))
         except TypeError:
-            sz = gbl.gInterpreter.ProcessLine("sizeof(%s);" % (_get_name(tt),))
-        _sizes[tt] = sz
-        return sz
-
-_typeids = {}
+            misses.append(t)
+    if 1 < len(misses):
+      # resolve all remaining misses with a single declaration
+        aname = 'alignof_'+str(next(_alignof_count))
+        with _stderr_capture():
+            ok = gbl.gInterpreter.Declare(
+                "namespace _cppyy_internal { size_t %s[] = {%s}; }" %\
+                (aname, ', '.join('alignof(%s)' % _get_name(t) for t in misses)))
+      # on failure, the types are resolved one by one below, raising for the culprit
+        if ok:
+            for t, al in zip(misses, getattr(gbl._cppyy_internal, aname)):
+                _alignments.setdefault(t, al)
+    return [_alignments(t) for t in tts]
+
+def _resolve_offsetof(key):
+    cls, member = key
+    dm = None
+    if not isinstance(cls, str):
+      # lookup instantiates the data member (then fails, as there is no instance)
+        try:
+            getattr(cls, member)
+        except AttributeError:
+            pass
+        dm = cls.__dict__.get(member) # inherited members need a base offset
+    if hasattr(dm, '__cpp_reflex__'):
+        from . import reflex
+        return dm.__cpp_reflex__(reflex.OFFSET)
+    offset = _process_line("offsetof(%s, %s);" % (_get_name(cls), member))
+    if offset is None:
+        raise AttributeError('%s has no data member "%s"' % (_get_name(cls), member))
+    return offset
+
+_offsets = _typecache.TypeInfoCache(_resolve_offsetof)
+def offsetof(cls, member):
+    """Returns the offset (in chars) of data member <member> in C++ class <cls>,
+    or a list of offsets if <member> is a list of member names."""
+    if isinstance(member, (list, tuple)):
+        return [_offsets((cls, m)) for m in member]
+    return _offsets((cls, member))
+
+_typeid_count = itertools.count()
+def _resolve_typeid(tt):
+    tidname = 'typeid_'+str(next(_typeid_count))
+    gbl.gInterpreter.ProcessLine(
+        "namespace _cppyy_internal { auto* %s = &typeid(%s); }" %\
+        (tidname, _get_name(tt),))
+    return getattr(gbl._cppyy_internal, tidname)
+
+_typeids = _typecache.TypeInfoCache(_resolve_typeid)
 def typeid(tt):
     """Returns the C++ runtime type information for type <tt>."""
     if not isinstance(tt, type):
         tt = type(tt)
+    return _typeids(tt)
+
+def set_type_cache_size(maxsize):
+    """Bound the sizeof/alignof/offsetof/typeid caches to <maxsize> entries
+    each, evicting the least recently used ones; None (the default) means no
+    bound.
+    """
+    for cache in (_sizes, _alignments, _offsets, _typeids):
+        cache.set_maxsize(maxsize)
+
+def _split_scoped_name(name):
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(name):
+        if c == '<':
+            depth += 1
+        elif c == '>':
+            depth -= 1
+        elif c == ':' and depth == 0 and name[i:i+2] == '::':
+            parts.append(name[start:i])
+            start = i+2
+    parts.append(name[start:])
+    return [p for p in parts if p]
+
+def _resolve(name):
     try:
-        return _typeids[tt]
-    except KeyError:
-        tidname = 'typeid_'+str(len(_typeids))
-        gbl.gInterpreter.ProcessLine(
-            "namespace _cppyy_internal { auto* %s = &typeid(%s); }" %\
-            (tidname, _get_name(tt),))
-        tid = getattr(gbl._cppyy_internal, tidname)
-        _typeids[tt] = tid
-        return tid
+        obj = gbl
+        for part in _split_scoped_name(name):
+            obj = getattr(obj, part)
+        return obj
+    except AttributeError:
+        if not hasattr(_backend, 'CreateScopeProxy'):
+            raise
+  # e.g. template instances in template scopes
+    try:
+        obj = _backend.CreateScopeProxy(name)
+    except TypeError:       # raised for unknown classes
+        obj = None
+    if obj is None:
+        raise AttributeError("no such C++ entity: %s" % name)
+    return obj
+
+def prewarm(names, background=True):
+    """Resolve the C++ scopes, classes, functions, and templates named in <names>
+    (e.g. 'std::vector<int>'), so that their lookup, binding, and pythonization
+    costs are not incurred on first use. Returns a concurrent.futures.Future,
+    with as result a dictionary of each name to its Python proxy, or to the
+    exception raised while resolving it. If <background>, the work is done on a
+    separate thread, otherwise the returned future is already done.
+    """
+    import concurrent.futures as cf
+
+    names = list(names)
+    future = cf.Future()
+
+    def resolve_all():
+        if not future.set_running_or_notify_cancel():
+            return
+        resolved = dict()
+        for name in names:
+            try:
+                resolved[name] = _resolve(name)
+            except Exception as e:
+                resolved[name] = e
+        future.set_result(resolved)
+
+    if background:
+        import threading
+        worker = threading.Thread(target=resolve_all, name='cppyy-prewarm')
+        worker.daemon = True
+        worker.start()
+    else:
+        resolve_all()
+    return future
+
+def vectorize(func):
+    """Wrap C++ function <func> into a NumPy ufunc-like callable that applies
+    it elementwise in a JITed loop (see cppyy.numpy.vectorize).
+    """
+    from .numpy import vectorize as np_vectorize
+    return np_vectorize(func)
 
 def multi(*bases):      # after six, see also _typemap.py
     """Resolve metaclasses for multiple inheritance."""
@@ -474,6 +954,6 @@ def multi(*bases):      # after six, see also _typemap.py
 
 #- workaround (TODO: may not be needed with Clang9) --------------------------
 if 'win32' in sys.platform:
-    cppdef("""template<>
+    _cppdef("""template<>
     std::basic_ostream<char, std::char_traits<char>>& __cdecl std::endl<char, std::char_traits<char>>(
         std::basic_ostream<char, std::char_traits<char>>&);""")
@@ -0,0 +1,291 @@
+""" Persistent, opt-in, cache of cppdef() and include() results.
+
+Declarations are keyed on a hash of their source and the content of all files
+that it includes, the active include paths, the Cling flags, the versions of
+cppyy and its backend, and the key of the previously cached declaration (so
+that code building on earlier code ends up with a consistent key). On a miss,
+the code is declared as normal and a dictionary (see the documentation on
+"Dictionaries") is built from it in the cache directory by a background
+process, one build at a time, so that a miss costs no more than running
+without the cache. On a hit, only that dictionary is loaded: its rootmap and
+the autoloading of its header provide the declarations when first used, and
+everything that the dictionary provides compiled skips code generation.
+
+Only the public cppdef/include functions go through the cache; cppyy's own
+helpers declare their code directly, keeping them out of the chain of keys.
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import warnings
+
+try:
+    import fcntl
+except ImportError:         # not POSIX: builds are not serialized
+    fcntl = None
+
+__all__ = [
+    'set_cache_dir',
+    'cache_stats',
+    ]
+
+
+_cache_dir = None
+_stats = {'hits' : 0, 'misses' : 0, 'stores' : 0, 'errors' : 0}
+_last_key = ''          # previous link in the chain of cached declarations
+
+# headers that Cling makes available implicitly, which snippets may thus use
+# without including them, but which a stand-alone build of them needs
+_prelude = ('algorithm', 'array', 'atomic', 'bitset', 'cassert', 'cctype', 'cerrno',
+    'cfloat', 'chrono', 'climits', 'cmath', 'complex', 'cstddef', 'cstdint', 'cstdio',
+    'cstdlib', 'cstring', 'ctime', 'deque', 'exception', 'fstream', 'functional',
+    'initializer_list', 'iomanip', 'ios', 'iosfwd', 'iostream', 'istream', 'iterator',
+    'limits', 'list', 'map', 'memory', 'mutex', 'new', 'numeric', 'ostream', 'queue',
+    'random', 'ratio', 'set', 'sstream', 'stack', 'stdexcept', 'streambuf', 'string',
+    'tuple', 'type_traits', 'typeinfo', 'unordered_map', 'unordered_set',
+    'utility', 'valarray', 'vector')
+
+
+def set_cache_dir(path):
+    """Enable the persistent cache of cppdef/include results under <path>;
+    use None to disable the cache.
+    """
+    global _cache_dir
+    if path is not None:
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.isdir(path):
+            os.makedirs(path)
+    _cache_dir = path
+
+def cache_stats():
+    """Returns a dictionary with the number of cache hits, misses, stores
+    (dictionary builds started), and errors (failures to load or build a
+    cached dictionary).
+    """
+    stats = dict(_stats)
+    stats['cache_dir'] = _cache_dir
+    return stats
+
+
+#- helpers -------------------------------------------------------------------
+def _include_dirs():
+    import cppyy
+    dirs = list()
+    for flag in shlex.split(str(cppyy.gbl.gInterpreter.GetIncludePath())):
+        if flag.startswith('-I') and flag[2:]:
+            dirs.append(flag[2:])
+    return dirs
+
+def _locate_header(header):
+    if os.path.isabs(header):
+        return os.path.isfile(header) and header or None
+    for d in [os.curdir]+_include_dirs():
+        fname = os.path.join(d, header)
+        if os.path.isfile(fname):
+            return os.path.abspath(fname)
+    return None
+
+def _backend_version():
+    try:
+        import cppyy_backend as cpb
+        return str(cpb.__version__)
+    except (ImportError, AttributeError):
+        return ''
+
+_cppflags = None
+def _compile_flags():
+    global _cppflags
+    if _cppflags is None:
+        _cppflags = shlex.split(subprocess.check_output(['cling-config', '--cppflags']).decode())
+    return shlex.split(os.environ.get('CXX', 'c++')), _cppflags
+
+def _dependencies(source, stdin=None):
+    """Contents hash of all files included by <source> (a file name, or '-'
+    with the code passed as <stdin>), as listed by the compiler, or None if
+    they can not be determined."""
+    try:
+        cxx, cppflags = _compile_flags()
+        proc = subprocess.Popen(cxx+cppflags+['-I'+d for d in _include_dirs()]+\
+                                ['-M', '-MT', 'deps', '-x', 'c++', source],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, _ = proc.communicate(stdin and stdin.encode('utf-8'))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    if proc.returncode:
+        return None
+
+    h = hashlib.sha256()
+    for dep in sorted(set(shlex.split(out.decode().replace('\\\n', ' '))[1:])):
+        if dep == '-':
+            continue
+        try:
+            with open(dep, 'rb') as f:
+                h.update(('%s\n' % dep).encode('utf-8'))
+                h.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            return None
+    return h.hexdigest()
+
+def _key(kind, text):
+    import cppyy
+    h = hashlib.sha256()
+    for part in (kind, text, _last_key,
+                 str(cppyy.gbl.gInterpreter.GetIncludePath()),
+                 os.environ.get('EXTRA_CLING_ARGS', ''),
+                 cppyy.__version__, _backend_version(), sys.platform):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def _path(key, ext, cache_dir=None):
+    return os.path.join(cache_dir or _cache_dir, key+ext)
+
+def _run(cmd, cwd):
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    out, _ = proc.communicate()
+    if proc.returncode:
+        raise OSError("'%s' failed:\n%s" % (' '.join(cmd), out.decode('utf-8', 'replace')))
+
+
+#- cache interface (used by cppdef/include/c_include) ------------------------
+def lookup(kind, text):
+    """Returns a tuple (hit, key): if hit, the dictionary for <text> has been
+    loaded; key is None if the cache is disabled or <text> can not be cached.
+    """
+    global _last_key
+
+    if _cache_dir is None:
+        return False, None
+
+    if kind != 'cppdef':
+        header = _locate_header(text)
+        if header is None:          # e.g. only reachable through system paths
+            return False, None
+        deps = _dependencies(header)
+        if deps is None:
+            return False, None
+        text = '%s\n%s' % (header, deps)
+    elif '#include' in text:
+        deps = _dependencies('-', text)
+        if deps is None:
+            return False, None
+        text = '%s\n%s' % (text, deps)
+
+    key = _key(kind, text)
+    if os.path.exists(_path(key, 'Dict.so')):
+        import cppyy
+        try:
+            cppyy.load_reflection_info(_path(key, 'Dict.so'))
+        except RuntimeError:
+            _stats['errors'] += 1
+        else:
+            _stats['hits'] += 1
+            _last_key = key
+            return True, key
+    elif os.path.exists(_path(key, '.failed')):
+        _stats['errors'] += 1
+        warnings.warn('the cached dictionary of this %s could not be built (see %s)' % \
+                      (kind, _path(key, '.failed')), RuntimeWarning)
+
+    _stats['misses'] += 1
+    return False, key
+
+def store(key, kind, text):
+    """Start the build of a dictionary under <key> for successfully declared
+    <text> in the background."""
+    global _last_key
+
+    if key is None or _cache_dir is None:
+        return
+
+    if kind == 'cppdef':
+        body, selected = text, _path(key, '.h')
+    else:
+        header = _locate_header(text)
+        body, selected = '#include "%s"' % header, header
+        if kind == 'c_include':
+            body = 'extern "C" {\n%s\n}' % body
+
+    guard = 'CPPYY_CACHE_%s' % key
+    with open(_path(key, '.h'), 'w') as hdr:
+        hdr.write('#ifndef %s\n#define %s\n' % (guard, guard))
+        if _last_key:
+            hdr.write('#include "%s"\n' % _path(_last_key, '.h'))
+        else:
+            hdr.write(''.join('#include <%s>\n' % h for h in _prelude))
+        hdr.write('%s\n#endif\n' % body)
+    _last_key = key
+
+    if os.path.exists(_path(key, '.failed')) or os.path.exists(_path(key, 'Dict.so')):
+        return
+
+    try:
+        cxx, cppflags = _compile_flags()
+      # run this file by path: as a script, its directory would shadow modules
+        subprocess.Popen([sys.executable, '-c', _builder, os.path.abspath(__file__), _cache_dir,
+                          key, selected, json.dumps(cxx),
+                          json.dumps(cppflags+['-I'+d for d in _include_dirs()])],
+                         cwd=_cache_dir, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, close_fds=True, start_new_session=True)
+        _stats['stores'] += 1
+    except (OSError, subprocess.CalledProcessError) as e:
+        _stats['errors'] += 1
+        with open(_path(key, '.failed'), 'w') as failed:
+            failed.write(str(e))
+
+
+#- dictionary build, run in a separate process -------------------------------
+_builder = 'import runpy, sys; runpy.run_path(sys.argv[1], run_name="__main__")'
+
+def _build(cache_dir, key, selected, cxx, cppflags):
+    """Compile the header of <key> into a dictionary, with a rootmap for the
+    declarations from <selected>; one build at a time per cache directory."""
+    with open(os.path.join(cache_dir, 'build.lock'), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(_path(key, 'Dict.so', cache_dir)):
+            return                  # built by another process meanwhile
+
+        tmpdir = tempfile.mkdtemp(dir=cache_dir)
+        try:
+            with open(os.path.join(tmpdir, 'Linkdef.h'), 'w') as linkdef:
+                linkdef.write("""#ifdef __ROOTCLING__
+#pragma link off all classes;
+#pragma link off all functions;
+#pragma link off all globals;
+#pragma link off all typedef;
+
+#pragma link C++ defined_in "%s";
+#endif
+""" % selected)
+
+            incflags = [f for f in cppflags if f.startswith('-I')]
+            _run(['rootcling', '-f', key+'_rflx.cxx',
+                  '-rmf', key+'Dict.rootmap', '-rml', _path(key, 'Dict.so', cache_dir)]+\
+                  incflags+[_path(key, '.h', cache_dir), 'Linkdef.h'], tmpdir)
+            _run(cxx+cppflags+['-fPIC', '-O2', '-shared', key+'_rflx.cxx', '-o', key+'Dict.so'], tmpdir)
+
+          # move the library last: its presence marks a complete entry
+            for ext in ('Dict.rootmap', '_rflx_rdict.pcm', 'Dict.so'):
+                src = os.path.join(tmpdir, key+ext)
+                if os.path.exists(src):
+                    os.rename(src, _path(key, ext, cache_dir))
+        except OSError as e:
+            with open(_path(key, '.failed', cache_dir), 'w') as failed:
+                failed.write(str(e))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if hasattr(os, 'nice'):
+        os.nice(10)
+    _build(sys.argv[2], sys.argv[3], sys.argv[4], json.loads(sys.argv[5]), json.loads(sys.argv[6]))
+elif os.getenv('CPPYY_CACHE_DIR'):
+    set_cache_dir(os.getenv('CPPYY_CACHE_DIR'))
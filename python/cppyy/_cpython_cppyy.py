@@ -2,9 +2,13 @@
 """
 
 import ctypes
+import re
+import struct
 import sys
+import warnings
 
-from . import _stdcpp_fix
+from . import _startup, _stdcpp_fix
+from ._trampoline import _cpp_types
 from cppyy_backend import loader
 
 __all__ = [
@@ -16,17 +20,21 @@ __all__ = [
     'default',
     '_backend',
     '_begin_capture_stderr',
-    '_end_capture_stderr'
+    '_end_capture_stderr',
+    'save_template_manifest',
+    'load_template_manifest'
     ]
 
 # first load the dependency libraries of the backend, then pull in the
 # libcppyy extension module
 c = loader.load_cpp_backend()
+_startup.mark('load_cpp_backend')
 import libcppyy as _backend
 _backend._cpp_backend = c
 
 # explicitly expose APIs from libcppyy
 _w = ctypes.CDLL(_backend.__file__, ctypes.RTLD_GLOBAL)
+_startup.mark('libcppyy')
 
 
 # some beautification for inspect (only on p2)
@@ -55,6 +63,107 @@ if sys.hexversion < 0x3000000:
 
 
 ### template support ---------------------------------------------------------
+# element kinds of buffer formats, to allow bulk copies between equivalent
+# types (e.g. 'l' and 'q' on 64b Linux)
+_buffer_kinds = dict([(c, 'i') for c in 'bhilqn']+[(c, 'u') for c in 'BHILQN']+\
+                     [(c, 'f') for c in 'efd']+[('?', 'b')])
+_native_order = sys.byteorder == 'little' and '@=<' or '@=>!'
+
+def _buffer_kind(view):
+    fmt = view.format
+    if fmt[:1] in _native_order:
+        fmt = fmt[1:]
+    return _buffer_kinds.get(fmt), view.itemsize
+
+_cpp_typecodes = dict((name, tc) for tc, name in _cpp_types.items())
+
+def _vector_kind(vector):
+    try:
+        tc = _cpp_typecodes[vector.value_type]
+    except (KeyError, TypeError, AttributeError):
+        return None, 0              # e.g. std::vector<bool> or of class type
+    return _buffer_kinds.get(tc), struct.calcsize(tc)
+
+def _vector_extend_from_buffer(self, ll):
+    """Append the contents of <ll> to vector <self> with a single memory copy,
+    if <ll> exposes a 1-dim contiguous buffer of a matching element type.
+    """
+    kind, itemsize = _vector_kind(self)
+    if kind is None:
+        return False
+    if ll is self:
+        ll = type(self)(self)
+    try:
+        try:
+            src = memoryview(ll)
+        except TypeError:
+            if not isinstance(ll, _backend.CPPInstance) or not hasattr(ll, 'data'):
+                return False
+            src = memoryview(ll.data())     # e.g. other std::vector
+        if src.ndim != 1 or not src.c_contiguous or _buffer_kind(src) != (kind, itemsize):
+            return False
+    except (TypeError, ValueError, AttributeError, BufferError):
+        return False
+
+    old = self.size()
+    try:
+        self.resize(old+len(src))
+        memoryview(self.data()).cast('B')[old*itemsize:] = src.cast('B')
+    except (TypeError, ValueError, AttributeError, BufferError):
+        self.resize(old)
+        return False
+    return True
+
+def _is_buffer(obj):
+    try:
+        memoryview(obj)
+    except TypeError:
+        return False
+    return True
+
+def _vector_iadd(iadd):
+    """Returns an __iadd__ for std::vector that appends from a matching buffer
+    with a single memory copy, and otherwise falls back to <iadd> (the one that
+    the backend installed, if any) or to element-wise push_back.
+    """
+    def vector_iadd(self, ll):
+        if _vector_extend_from_buffer(self, ll):
+            return self
+      # (the backend's __iadd__ returns the result of insert() for buffers)
+        if iadd is not None and not _is_buffer(ll):
+            return iadd.__get__(self)(ll)
+        self.reserve(self.size()+len(ll))
+        for x in ll:
+            self.push_back(x)
+        return self
+    return vector_iadd
+
+# instantiations are shared across Template objects and keyed on a normalized
+# spelling of the arguments, so that e.g. vector[int], vector['int '], and
+# vector[cppyy.gbl.int] resolve to the same entry without a backend lookup
+_template_instantiations = dict()
+_template_punct = re.compile(r'\s*([<>,*&()\[\]])\s*')
+
+def _template_arg_key(arg):
+    if isinstance(arg, str):
+        return _template_punct.sub(r'\1', ' '.join(arg.split()))
+    if arg is int:
+        return 'int'
+    if type(arg) is int:            # exact, as e.g. enum values derive from int
+        return str(arg)
+    if isinstance(arg, type):
+        try:
+            return arg.__cpp_name__
+        except AttributeError:
+            pass
+    return (type(arg), arg)         # b/c e.g. True == 1 == 1.0
+
+def _template_key(name, args):
+    key = tuple(_template_arg_key(arg) for arg in args)
+    if all(isinstance(k, str) for k in key):
+        key = ','.join(key)
+    return (name, key)
+
 class Template(object):  # expected/used by ProxyWrappers.cxx in CPyCppyy
     stl_sequence_types   = ['std::vector', 'std::list', 'std::set', 'std::deque']
     stl_unrolled_types   = ['std::pair']
@@ -80,6 +189,15 @@ class Template(object):  # expected/used by ProxyWrappers.cxx in CPyCppyy
         except KeyError:
             pass
 
+      # same, but under a different spelling of the arguments
+        key = _template_key(self.__name__, args)
+        try:
+            pyclass = _template_instantiations[key]
+            self._instantiations[args] = pyclass
+            return pyclass
+        except (KeyError, TypeError):
+            pass
+
       # construct the type name from the types or their string representation
         newargs = [self.__name__]
         for arg in args:
@@ -90,9 +208,16 @@ class Template(object):  # expected/used by ProxyWrappers.cxx in CPyCppyy
 
       # memoize the class to prevent spurious lookups/re-pythonizations
         self._instantiations[args] = pyclass
+        try:
+            _template_instantiations[key] = pyclass
+        except TypeError:           # unhashable argument
+            pass
 
       # special case pythonization (builtin_map is not available from the C-API)
-        if 'push_back' in pyclass.__dict__ and not '__iadd__' in pyclass.__dict__:
+        if 'push_back' in pyclass.__dict__ and 'data' in pyclass.__dict__ and \
+                'resize' in pyclass.__dict__:
+            pyclass.__iadd__ = _vector_iadd(pyclass.__dict__.get('__iadd__'))
+        elif 'push_back' in pyclass.__dict__ and not '__iadd__' in pyclass.__dict__:
             if 'reserve' in pyclass.__dict__:
                 def iadd(self, ll):
                     self.reserve(len(ll))
@@ -148,12 +273,79 @@ class Template(object):  # expected/used by ProxyWrappers.cxx in CPyCppyy
 _backend.Template = Template
 
 
+#- template instantiation manifests ------------------------------------------
+def _manifest_args(args, pyclass):
+  # the arguments are taken, normalized, from the C++ name of the instantiated
+  # class, which also covers Python types (e.g. str -> std::string)
+    cppname = getattr(pyclass, '__cpp_name__', '')
+    start, end = cppname.find('<'), cppname.rfind('>')
+    if 0 <= start < end:
+        return _template_arg_key(cppname[start+1:end])
+    if isinstance(args, str):
+        return args
+    return None
+
+def save_template_manifest(fname):
+    """Write the class template instantiations performed so far to <fname>,
+    for replay at startup with load_template_manifest. Instantiations whose
+    arguments have no C++ spelling are skipped with a warning.
+    """
+    entries, skipped = dict(), list()
+    for (name, args), pyclass in list(_template_instantiations.items()):
+        cppargs = _manifest_args(args, pyclass)
+        if cppargs is None or '\n' in cppargs:
+            skipped.append('%s[%s]' % (name, args))
+        else:
+            entries[(name, cppargs)] = None     # ordered set
+    with open(fname, 'w') as manifest:
+        manifest.write('# cppyy template manifest: name<TAB>arguments\n')
+        for name, cppargs in entries:
+            manifest.write('%s\t%s\n' % (name, cppargs))
+    if skipped:
+        warnings.warn('template instantiations not written to manifest: %s' % ', '.join(skipped))
+
+def load_template_manifest(fname, background=False):
+    """Instantiate all class templates listed in manifest <fname> (as written
+    by save_template_manifest). Entries that fail (e.g. b/c the required code
+    is not loaded yet) are skipped. Returns the number of instantiations, or
+    if <background>, the thread doing the work in lieu of the caller.
+    """
+    entries = list()
+    with open(fname) as manifest:
+        for line in manifest:
+            line = line.rstrip('\n')
+            if line and line[0] != '#' and '\t' in line:
+                entries.append(line.split('\t', 1))
+
+    def replay():
+        count = 0
+        for name, args in entries:
+            try:
+                tmpl = gbl
+                for part in name.split('::'):
+                    tmpl = getattr(tmpl, part)
+                tmpl[args]
+                count += 1
+            except Exception:
+                pass
+        return count
+
+    if background:
+        import threading
+        worker = threading.Thread(target=replay, name='cppyy-template-manifest')
+        worker.daemon = True
+        worker.start()
+        return worker
+    return replay()
+
+
 #- :: and std:: namespaces ---------------------------------------------------
 gbl = _backend.CreateScopeProxy('')
 gbl.__class__.__repr__ = lambda cls : '<namespace cppyy.gbl at 0x%x>' % id(cls)
 gbl.std =  _backend.CreateScopeProxy('std')
 # for move, we want our "pythonized" one, not the C++ template
 gbl.std.move  = _backend.move
+_startup.mark('gbl')
 
 
 #- add to the dynamic path as needed -----------------------------------------
@@ -184,6 +376,7 @@ def add_default_paths():
         pass
 add_default_paths()
 del add_default_paths
+_startup.mark('default_paths')
 
 
 #- exports -------------------------------------------------------------------
@@ -0,0 +1,160 @@
+""" Python-side cache of overload resolution, keyed on the types of the call
+arguments (and the range of int values), with pinning of the resolved overloads.
+"""
+
+import collections
+import itertools
+
+__all__ = [
+    'DispatchCache',
+    ]
+
+
+# overload resolution also depends on the values of ints (e.g. a negative value
+# fails for unsigned parameters, a large one for int, upon which resolution moves
+# on to the next overload), so these are keyed on the range that they fall in;
+# ints outside the range of int are never pinned
+_nonnegative_int = 'int >= 0'
+_negative_int    = 'int < 0'
+_wide_int        = 'int (wide)'
+
+def _arg_key(arg):
+    argtype = type(arg)
+    if argtype is int:
+        if 0 <= arg < 0x80000000:
+            return _nonnegative_int
+        if -0x80000000 <= arg < 0:
+            return _negative_int
+        return _wide_int
+    return argtype
+
+# candidate C++ spellings of parameters for Python builtin argument types; these
+# need to be fully resolved (no typedefs) to match in __overload__
+def _spellings(*cpptypes):
+    return tuple(cpptypes)+tuple('const %s&' % t for t in cpptypes)
+
+_builtin_spellings = {
+    bool             : _spellings('bool'),
+    _nonnegative_int : _spellings('int', 'long', 'long long',
+                                  'unsigned int', 'unsigned long', 'unsigned long long'),
+    _negative_int    : _spellings('int', 'long', 'long long'),
+    float            : _spellings('double', 'float', 'long double'),
+    str              : ('const std::string&', 'std::string', 'const char*', 'std::string_view'),
+    }
+
+_max_candidates = 256       # beyond this many signatures, do not attempt to pin
+
+def _arg_spellings(argtype):
+    try:
+        return _builtin_spellings[argtype]
+    except KeyError:
+        pass
+    if not isinstance(argtype, type):
+        return None                     # e.g. wide ints
+    try:
+        name = argtype.__cpp_name__
+    except AttributeError:
+        return None
+    return (name, 'const %s&' % name, '%s&' % name, '%s&&' % name,
+            '%s*' % name, 'const %s*' % name)
+
+
+class DispatchCache(object):
+    """Wraps C++ function <func> (a cppyy.types.Function) and memoizes, per
+    tuple of Python argument types, the overload that it resolves to.
+
+    Types that unambiguously select a single overload (i.e. exactly one
+    overload has a signature that matches without conversions) are pinned to
+    that overload, by-passing overload resolution on subsequent calls; all
+    others go through the normal overload resolution. The cache is keyed on
+    types only, except for ints, which are split on sign and on whether they
+    fit an int. Arguments for which cppyy selects overloads by value in other
+    ways (e.g. cppyy.nullptr, or buffers) have no C++ class type and are
+    never pinned. If <maxsize> is given, the least recently used entries are
+    evicted beyond that many entries.
+    """
+
+    def __init__(self, func, maxsize=None):
+        self.__func__ = func
+        self.__name__ = func.__name__
+        self.__doc__  = func.__doc__
+        self._maxsize = maxsize
+        self._cache = collections.OrderedDict()
+        self._hits = self._misses = self._evictions = 0
+
+    def __call__(self, *args, **kwds):
+        if kwds:
+            return self.__func__(*args, **kwds)
+        key = tuple(map(_arg_key, args))
+        try:
+            func = self._cache[key]
+            self._hits += 1
+            if self._maxsize is not None:
+                self._cache.move_to_end(key)
+        except KeyError:
+            func = self._miss(key)
+        return func(*args)
+
+    def _resolve(self, key):
+        spellings = list()
+        for argtype in key:
+            sp = _arg_spellings(argtype)
+            if sp is None:
+                return None
+            spellings.append(sp)
+
+        ncandidates = 1
+        for sp in spellings:
+            ncandidates *= len(sp)
+        if _max_candidates < ncandidates:
+            return None
+
+        match = None
+        for sig in itertools.product(*spellings):
+            try:
+                ol = self.__func__.__overload__(', '.join(sig))
+            except (LookupError, TypeError):
+                continue
+            if match is not None:
+                return None             # ambiguous: leave to overload resolution
+            match = ol
+        return match
+
+    def _miss(self, key):
+        self._misses += 1
+        func = self._resolve(key)
+        if func is None:
+            func = self.__func__
+        self._cache[key] = func
+        if self._maxsize is not None:
+            while self._maxsize < len(self._cache):
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        return func
+
+    def pin(self, *args):
+        """Returns the overload that a call with <args> dispatches to, for use
+        as a callable that by-passes overload resolution (or the function
+        itself if the types of <args> do not select a unique overload)."""
+        key = tuple(map(_arg_key, args))
+        try:
+            return self._cache[key]
+        except KeyError:
+            return self._miss(key)
+
+    def stats(self):
+        """Returns a dictionary with the number of hits, misses, and evictions,
+        the number of entries currently cached, and how many of those are
+        pinned to a single overload."""
+        return {'hits'      : self._hits,
+                'misses'    : self._misses,
+                'evictions' : self._evictions,
+                'size'      : len(self._cache),
+                'pinned'    : sum(1 for f in self._cache.values() if f is not self.__func__)}
+
+    def clear(self):
+        self._cache.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def __repr__(self):
+        return '<cppyy.DispatchCache for %s>' % (self.__func__,)
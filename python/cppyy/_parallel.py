@@ -0,0 +1,279 @@
+""" Parallel application of C++ functions over sequences of arguments, on native
+threads with the GIL released for the whole batch.
+"""
+
+import array
+import os
+
+from ._trampoline import _call_expression, _cpp_types, _CallShim
+
+__all__ = [
+    'parallel_map',
+    ]
+
+
+_helpers_declared = False
+def _declare_helpers():
+    global _helpers_declared
+    if _helpers_declared:
+        return
+    import cppyy
+    cppyy._cppdef("""#include <algorithm>
+#include <atomic>
+#include <exception>
+#include <mutex>
+#include <system_error>
+#include <thread>
+#include <vector>
+namespace __cppyy_internal {
+template<typename F>
+void parallel_for(F&& f, size_t n, int workers) {
+    if ((size_t)workers > n) workers = (int)n;
+    if (workers <= 1) {
+        for (size_t i = 0; i < n; ++i) f(i);
+        return;
+    }
+    const size_t chunk = std::max<size_t>(1, n/(8*workers));
+    std::atomic<size_t> next{0};
+    std::exception_ptr error;
+    std::mutex m;
+    auto run = [&]() {
+        try {
+            for (size_t b; (b = next.fetch_add(chunk)) < n;) {
+                const size_t e = std::min(n, b+chunk);
+                for (size_t i = b; i < e; ++i) f(i);
+            }
+        } catch (...) {
+            std::lock_guard<std::mutex> lock(m);
+            if (!error) error = std::current_exception();
+            next = n;
+        }
+    };
+    std::vector<std::thread> threads;
+    threads.reserve(workers-1);
+    try {
+        for (int k = 1; k < workers; ++k) threads.emplace_back(run);
+    } catch (const std::system_error&) {
+        // out of threads: continue with those that were started
+    }
+    run();
+    for (auto& t : threads) t.join();
+    if (error) std::rethrow_exception(error);
+}
+
+// storage of results: bool as int (std::vector<bool> is not thread-safe for
+// writes), class instances boxed (they need not be default constructible)
+template<typename R>
+struct parallel_store {
+    typedef typename std::decay<R>::type D;
+    static constexpr bool boxed = std::is_class<D>::value && !std::is_same<D, std::string>::value;
+    typedef typename std::conditional<std::is_same<D, bool>::value, int,
+        typename std::conditional<boxed, D*, D>::type>::type type;
+
+    template<typename T>
+    static type store(T&& t, std::true_type) { return new D(std::forward<T>(t)); }
+    template<typename T>
+    static type store(T&& t, std::false_type) { return (type)t; }
+    template<typename T>
+    static type store(T&& t) { return store(std::forward<T>(t), std::integral_constant<bool, boxed>{}); }
+
+    static void release(std::vector<type>& v, std::true_type) { for (auto p : v) delete p; }
+    static void release(std::vector<type>&, std::false_type) {}
+    static void release(std::vector<type>& v) { release(v, std::integral_constant<bool, boxed>{}); }
+
+    static char kind() { return boxed ? 'o' : (std::is_same<D, bool>::value ? '?' : 'v'); }
+}; }""")
+    _helpers_declared = True
+
+
+class _Input(object):
+    """Argument sequence converted for use from C++: <param> is the C++
+    parameter type to pass <value> as and <elem> the element expression."""
+
+    def __init__(self, value, param, elem, cpptype):
+        self.value   = value
+        self.param   = param
+        self.elem    = elem
+        self.cpptype = cpptype
+
+def _buffer_format(obj):
+    try:
+        view = memoryview(obj)
+    except TypeError:
+        return None, None
+    fmt = view.format.lstrip('@')
+    if view.ndim != 1 or not view.c_contiguous or fmt not in _cpp_types:
+        raise TypeError('buffer arguments must be 1-dimensional, contiguous, and of a '
+                        'native builtin type (format "%s" given)' % view.format)
+    return view, fmt
+
+def _convert(arg):
+    import cppyy
+
+    if not isinstance(arg, str):
+        view, fmt = _buffer_format(arg)
+        if view is not None:
+            return _Input(arg, 'const %s*' % _cpp_types[fmt], '%s[i]', _cpp_types[fmt]), len(view)
+
+    values = list(arg)
+    types = set(map(type, values))
+    if not types:
+        return None, 0
+
+  # builtin numbers are converted in bulk through the array module
+    if types == {bool}:
+        return _Input(cppyy.gbl.std.vector['bool'](values),
+                      'const std::vector<bool>&', '%s[i]', 'bool'), len(values)
+    if types <= {int, float} and not types == {int}:
+        return _Input(array.array('d', values), 'const double*', '%s[i]', 'double'), len(values)
+    if types == {int}:
+        for tc in ('i', 'q'):
+            try:
+                return _Input(array.array(tc, values),
+                              'const %s*' % _cpp_types[tc], '%s[i]', _cpp_types[tc]), len(values)
+            except OverflowError:
+                pass
+        raise OverflowError('integer argument out of range for long long')
+    if types == {str}:
+        return _Input(cppyy.gbl.std.vector['std::string'](values),
+                      'const std::vector<std::string>&', '%s[i]', 'const std::string&'), len(values)
+
+  # instances of a single C++ class are passed by pointer
+    if len(types) == 1:
+        cls = types.pop()
+        name = getattr(cls, '__cpp_name__', None)
+        if name is not None and hasattr(cls, '__python_owns__'):
+            return _Input(cppyy.gbl.std.vector[name+'*'](values),
+                          'const std::vector<%s*>&' % name, '(*%s[i])', name+'&'), len(values)
+    raise TypeError('unsupported argument types (%s)' % ', '.join(sorted(t.__name__ for t in types)))
+
+
+_kernels = dict()
+
+class _Kernel(object):
+    """JITed parallel loops for one call expression and argument conversions."""
+
+    def __init__(self, call, inputs):
+        _declare_helpers()
+
+        self._inputs = inputs
+        self._runs   = dict()
+        self._shim   = _CallShim('parallel', call, [inp.cpptype for inp in inputs],
+            "char kind() { return std::is_void<R>::value ? '\\0' : parallel_store<R>::kind(); }")
+        kind = self._shim.ns.kind()
+        self.kind = kind != '\0' and kind or ''    # empty for void
+
+    def run(self, outtype=None):
+        try:
+            return self._runs[outtype]
+        except KeyError:
+            pass
+
+        params = ''.join(', %s in%d' % (inp.param, i) for i, inp in enumerate(self._inputs))
+        elems  = ', '.join(inp.elem % ('in%d' % i) for i, inp in enumerate(self._inputs))
+        if outtype is not None:
+            body = """void run_%(outname)s(intptr_t self, size_t n, int workers, %(outtype)s* out%(params)s) {
+    parallel_for([&](size_t i) { out[i] = (%(outtype)s)call(self%(sep)s%(elems)s); }, n, workers);
+}"""
+        elif not self.kind:
+            body = """void run_void(intptr_t self, size_t n, int workers%(params)s) {
+    parallel_for([&](size_t i) { call(self%(sep)s%(elems)s); }, n, workers);
+}"""
+        else:
+            body = """std::vector<parallel_store<R>::type> run_list(intptr_t self, size_t n, int workers%(params)s) {
+    std::vector<parallel_store<R>::type> out(n);
+    try {
+        parallel_for([&](size_t i) { out[i] = parallel_store<R>::store(call(self%(sep)s%(elems)s)); }, n, workers);
+    } catch (...) {
+        parallel_store<R>::release(out);
+        throw;
+    }
+    return out;
+}"""
+        outname = outtype and outtype.replace(' ', '_') or (self.kind and 'list' or 'void')
+        self._shim.declare(body % {'outname' : outname, 'outtype' : outtype, 'params' : params,
+                                   'sep' : self._shim.sep, 'elems' : elems})
+
+        run = getattr(self._shim.ns, 'run_'+outname)
+        run.__release_gil__ = True
+        self._runs[outtype] = run
+        return run
+
+
+def parallel_map(func, *iterables, workers=None, out=None):
+    """Applies C++ function (or bound method) <func> to the elements of
+    <iterables> (one per argument of <func>, all of the same length) on a pool
+    of <workers> native threads (default: the number of CPUs). The arguments
+    are converted up front, then all calls run in C++ with the GIL released.
+
+    Iterables can be buffers (e.g. array.array or NumPy arrays) of builtin
+    types, which are used in place, or sequences of numbers, strings, or
+    instances of a C++ class, which are converted first. Results are returned
+    as a list, or stored in the writable buffer <out>, which is then returned.
+    The overload is selected by the C++ compiler and any C++ exception is
+    raised after all workers finish.
+    """
+    import cppyy
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, int(workers))
+
+    inputs, n = list(), None
+    for arg in iterables:
+        inp, size = _convert(arg)
+        if n is not None and size != n:
+            raise ValueError('all arguments must have the same length')
+        n = size
+        inputs.append(inp)
+
+    if out is not None:
+        view, fmt = _buffer_format(out)
+        if view is None or view.readonly:
+            raise TypeError('out must be a writable buffer')
+        if n is None:
+            n = len(view)
+        elif len(view) != n:
+            raise ValueError('out must have the length of the arguments (%d)' % n)
+    elif n is None:
+        raise TypeError('parallel_map() requires at least one iterable or an out buffer')
+
+    if not n:
+        if out is None:
+            return list()
+        return out
+
+    if None in inputs:
+        raise TypeError('can not determine the argument types of empty sequences')
+
+    inst, call = _call_expression(func)
+    key = (call, tuple((inp.param, inp.elem, inp.cpptype) for inp in inputs))
+    try:
+        kernel = _kernels[key]
+    except KeyError:
+        try:
+            kernel = _kernels[key] = _Kernel(call, inputs)
+        except SyntaxError:
+            raise TypeError('%s does not support argument types (%s)' % \
+                            (func.__name__, ', '.join(inp.cpptype for inp in inputs)))
+
+    this = inst is not None and cppyy.addressof(inst) or 0
+    values = [inp.value for inp in inputs]
+    if out is not None:
+        if not kernel.kind or kernel.kind == 'o':
+            raise TypeError('%s does not return a builtin type' % func.__name__)
+        kernel.run(_cpp_types[fmt])(this, n, workers, out, *values)
+        return out
+
+    if not kernel.kind:
+        kernel.run()(this, n, workers, *values)
+        return [None]*n
+
+    result = kernel.run()(this, n, workers, *values)
+    if kernel.kind == '?':
+        return [bool(x) for x in result]
+    result = list(result)
+    if kernel.kind == 'o':
+        for x in result:
+            x.__python_owns__ = True
+    return result
@@ -2,6 +2,11 @@
 """
 
 import re
+import sys
+import threading
+import time
+
+_clock = time.perf_counter
 
 __all__ = [
     'add_pythonization',
@@ -49,10 +54,147 @@ def add_exception_mapping(cpp_exception, py_exception):
 
 #--- Pythonization factories --------------------------------------------
 
-def set_gil_policy(match_class, match_method, release_gil=True):
+def set_gil_policy(match_class, match_method, release_gil=True, threshold=1E-4, samples=16):
+    """Release the GIL during calls to methods matching <match_method> of classes
+    matching <match_class>. If <release_gil> is 'auto', the decision is instead
+    made per method, based on the median duration of its first <samples> calls
+    compared to <threshold> (in seconds); see gil_policy_decisions().
+    """
+    if release_gil == 'auto':
+        return _auto_gil_policy(match_class, match_method, threshold, samples)
     return set_method_property(match_class, match_method, '__release_gil__', int(release_gil))
 
 
+# automatic GIL release: calls to probed functions are timed through the
+# monitoring API of the interpreter (PEP 669), which leaves the overload, with
+# all its properties, in place; call sites that call anything else are disabled
+# on first sight, and monitoring stops once all probes have decided
+_gil_decisions = list()
+_gil_probes    = dict()         # hash of overload set -> probe
+_gil_lock      = threading.Lock()
+_gil_tool      = None
+_gil_calls     = threading.local()
+
+class _GILProbe(object):
+    def __init__(self, name, func, threshold, samples):
+        self.name      = name
+        self.func      = func       # keeps the hash, its method info address, unique
+        self.threshold = threshold
+        self.samples   = samples
+        self.timings   = list()
+
+    def record(self, elapsed):
+        # called with _gil_lock held; returns True once decided
+        self.timings.append(elapsed)
+        if len(self.timings) < self.samples:
+            return False
+        median = sorted(self.timings)[len(self.timings)//2]
+        release = self.threshold < median
+        if release:
+            self.func.__release_gil__ = True
+        _gil_decisions.append(
+            {'name'        : self.name,
+             'median'      : median,
+             'samples'     : len(self.timings),
+             'release_gil' : release})
+        return True
+
+def _gil_on_call(code, offset, func, arg0):
+    if type(func) is not _backend.CPPOverload or hash(func) not in _gil_probes:
+        return sys.monitoring.DISABLE
+    try:
+        calls = _gil_calls.stack
+    except AttributeError:
+        calls = _gil_calls.stack = list()
+    calls.append((hash(func), _clock()))
+
+def _gil_on_return(code, offset, func, arg0):
+    if type(func) is not _backend.CPPOverload:
+        return
+    calls = getattr(_gil_calls, 'stack', None)
+    if not calls or calls[-1][0] != hash(func):
+        return                      # call started before monitoring
+    key, start = calls.pop()
+    elapsed = _clock()-start
+    with _gil_lock:
+        probe = _gil_probes.get(key)
+        if probe is not None and probe.record(elapsed):
+            del _gil_probes[key]
+            if not _gil_probes:
+                _gil_monitoring(False)
+
+def _gil_monitoring(enable):
+    # called with _gil_lock held
+    global _gil_tool
+    mon, events = sys.monitoring, sys.monitoring.events
+    if enable and _gil_tool is None:
+        for tool in (4, 3):         # not reserved for debuggers, profilers, etc.
+            if mon.get_tool(tool) is None:
+                break
+        else:
+            raise RuntimeError('no sys.monitoring tool id available to time calls')
+        mon.use_tool_id(tool, 'cppyy GIL policy')
+        mon.register_callback(tool, events.CALL, _gil_on_call)
+        mon.register_callback(tool, events.C_RETURN, _gil_on_return)
+        mon.register_callback(tool, events.C_RAISE, _gil_on_return)
+        mon.set_events(tool, events.CALL | events.C_RETURN | events.C_RAISE)
+        _gil_tool = tool
+    elif not enable and _gil_tool is not None:
+        mon.set_events(_gil_tool, events.NO_EVENTS)
+        for event in (events.CALL, events.C_RETURN, events.C_RAISE):
+            mon.register_callback(_gil_tool, event, None)
+        mon.free_tool_id(_gil_tool)
+        _gil_tool = None
+
+def probe_gil_policy(scope, name, threshold=1E-4, samples=16):
+    """Time the first <samples> calls from Python to function <name> in <scope>
+    (a class or namespace) and release the GIL for subsequent calls if their
+    median duration exceeds <threshold> (in seconds). Requires Python 3.12.
+    """
+    if not hasattr(sys, 'monitoring'):
+        raise NotImplementedError('timing calls requires sys.monitoring (Python 3.12)')
+    func = getattr(scope, name)
+    if type(func) is not _backend.CPPOverload:
+        raise TypeError('%s is not a C++ function' % name)
+    probe = _GILProbe('%s::%s' % (getattr(scope, '__cpp_name__', ''), name),
+                      func, threshold, samples)
+    with _gil_lock:
+        _gil_probes[hash(func)] = probe
+        _gil_monitoring(True)
+  # call sites disabled while this function was not probed are to be seen again
+    sys.monitoring.restart_events()
+
+def gil_policy_decisions():
+    """Returns a list of the decisions made by automatic GIL release policies,
+    each a dictionary with the function name, the median duration (in seconds)
+    and number of timed calls, and whether the GIL will be released.
+    """
+    return list(_gil_decisions)
+
+def _auto_gil_policy(match_class, match_method, threshold, samples):
+    if not hasattr(sys, 'monitoring'):
+        raise NotImplementedError('timing calls requires sys.monitoring (Python 3.12)')
+
+    class gil_pythonizor(object):
+        def __init__(self, match_class, match_method, threshold, samples):
+            self.match_class = re.compile(match_class)
+            self.match_method = re.compile(match_method)
+            self.threshold = threshold
+            self.samples = samples
+
+        def __call__(self, obj, name):
+            if not self.match_class.match(name):
+                return
+            for k in dir(obj):
+                if not self.match_method.match(k):
+                    continue
+                try:
+                    probe_gil_policy(obj, k, self.threshold, self.samples)
+                except (AttributeError, TypeError):
+                    pass
+    return gil_pythonizor(match_class, match_method, threshold, samples)
+
+
 def set_ownership_policy(match_class, match_method, python_owns_result):
     return set_method_property(match_class, match_method, 
                                '__creates__', int(python_owns_result))
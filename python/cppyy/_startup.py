@@ -0,0 +1,60 @@
+""" Profiling of the phases of "import cppyy", enabled with the envar
+CPPYY_PROFILE_STARTUP=1.
+"""
+
+import os
+import sys
+import time
+
+__all__ = [
+    'startup_profile',
+    ]
+
+try:
+    _clock = time.perf_counter
+except AttributeError:      # p2
+    _clock = time.time
+
+_enabled = os.getenv('CPPYY_PROFILE_STARTUP', '0') not in ('', '0')
+_phases  = []
+
+def _rss():
+    """Current resident set size in bytes (peak RSS if current is unavailable)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return 'darwin' in sys.platform and rss or rss*1024
+    except ImportError:
+        return 0
+
+if _enabled:
+    _last = (_clock(), _rss())
+
+def mark(phase):
+    """Record the end of startup phase <phase>; no-op unless profiling."""
+    global _last
+    if not _enabled:
+        return
+    now, rss = _clock(), _rss()
+    _phases.append((phase, now-_last[0], rss-_last[1], rss))
+    _last = (now, rss)
+
+def startup_profile(report=False):
+    """Returns a list of (phase, wall time in s, RSS increase in bytes, RSS in
+    bytes) for the phases of "import cppyy" (and of cppyy.ll, if imported), in
+    order. Profiling requires CPPYY_PROFILE_STARTUP=1 to be set before import,
+    otherwise the list is empty. If <report>, also print a table to stdout.
+    """
+    if report:
+        total = 0.
+        print('%-24s %10s %12s %12s' % ('phase', 'time (ms)', 'dRSS (kB)', 'RSS (kB)'))
+        for phase, elapsed, drss, rss in _phases:
+            total += elapsed
+            print('%-24s %10.2f %12d %12d' % (phase, elapsed*1E3, drss//1024, rss//1024))
+        print('%-24s %10.2f' % ('total', total*1E3))
+    return list(_phases)
@@ -0,0 +1,351 @@
+""" JITed call trampolines: Python-callable C functions that call a single C++
+overload with inline conversions for a fixed signature.
+"""
+
+import itertools
+
+__all__ = [
+    'compile_call',
+    ]
+
+
+_signed_types   = ('signed char', 'short', 'int', 'long', 'long long')
+_unsigned_types = ('unsigned char', 'unsigned short', 'unsigned int', 'unsigned long',
+                   'unsigned long long')
+_float_types    = ('float', 'double', 'long double')
+_string_types   = ('std::string', 'std::basic_string<char>')
+
+def _normalize(cpptype):
+    cpptype = ' '.join(cpptype.replace('*', ' * ').replace('&', ' & ').split())
+    return cpptype.replace('* ', '*').replace(' *', '*').replace(' &', '&').replace('& &', '&&')
+
+def _split_signature(signature):
+    args, depth, start = [], 0, 0
+    for i, c in enumerate(signature):
+        if c in '<(':
+            depth += 1
+        elif c in '>)':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            args.append(signature[start:i])
+            start = i+1
+    args.append(signature[start:])
+    return [_normalize(a) for a in args if a.strip()]
+
+def _func_cpp_name(func):
+    """Fully qualified C++ name of function (or method) <func>."""
+  # (the __cpp_name__ of a function is the C++ type of a pointer to it, so
+  # take the name of the scope that declares it instead)
+    import cppyy
+    name = func.__name__
+    scope = func.im_class.__cpp_name__
+    if not scope:
+        return name
+    if name == '__init__':          # constructors are named after their class
+        name = cppyy._split_scoped_name(scope)[-1].split('<', 1)[0]
+    return scope+'::'+name
+
+def _call_expression(func):
+    """Returns the instance that <func> is bound to (or None) and a C++ call
+    expression with "%s" for the arguments and, if bound, "self" (an intptr_t)
+    for the address of the instance."""
+    self = getattr(func, 'im_self', None)
+    if self is not None:
+        return self, '((%s*)self)->%s(%%s)' % (type(self).__cpp_name__, func.__name__)
+    return None, '%s(%%s)' % _func_cpp_name(func)
+
+
+#- shared by cppyy.numpy, parallel_map, and numba_ext -------------------------
+# C++ types for buffer (and NumPy dtype) typecodes
+_cpp_types = {
+    '?' : 'bool',
+    'b' : 'signed char',    'B' : 'unsigned char',
+    'h' : 'short',          'H' : 'unsigned short',
+    'i' : 'int',            'I' : 'unsigned int',
+    'l' : 'long',           'L' : 'unsigned long',
+    'q' : 'long long',      'Q' : 'unsigned long long',
+    'f' : 'float',          'd' : 'double',
+    'g' : 'long double',
+    'F' : 'std::complex<float>', 'D' : 'std::complex<double>',
+    }
+
+_typecode_declared = False
+def _declare_typecode():
+    """JIT __cppyy_internal::typecode<T>(), which returns the typecode of
+    builtin T (or '\\0' if T is not a builtin), and enum_underlying<T>, the
+    underlying type of enum T (or T itself)."""
+    global _typecode_declared
+    if _typecode_declared:
+        return
+    import cppyy
+    cppyy._cppdef("""namespace __cppyy_internal {
+template<typename T>
+char typecode() {
+    if (std::is_same<T, bool>::value) return '?';
+    if (std::is_floating_point<T>::value)
+        return sizeof(T) == sizeof(float) ? 'f' : (sizeof(T) == sizeof(double) ? 'd' : 'g');
+    if (std::is_integral<T>::value) {
+        const bool s = std::is_signed<T>::value;
+        switch (sizeof(T)) {
+        case 1: return s ? 'b' : 'B';
+        case 2: return s ? 'h' : 'H';
+        case 4: return s ? 'i' : 'I';
+        case 8: return s ? 'q' : 'Q';
+        }
+    }
+    return '\\0';
+}
+
+template<typename T, bool = std::is_enum<T>::value>
+struct enum_underlying { typedef T type; };
+template<typename T>
+struct enum_underlying<T, true> { typedef typename std::underlying_type<T>::type type; };
+}""")
+    _typecode_declared = True
+
+_shim_count = itertools.count()
+
+class _CallShim(object):
+    """JITed namespace __cppyy_internal::<prefix>_<n> with a function
+
+        auto call(intptr_t self, <cpptypes[0]> a0, ...)
+
+    that evaluates C++ call expression <call> (see _call_expression), a typedef
+    R of its result type, and the code in <extra> (which can use R); further
+    code, e.g. loops over call(), is added to the namespace with declare().
+    """
+
+    def __init__(self, prefix, call, cpptypes, extra=''):
+        import cppyy
+        _declare_typecode()
+
+        self.nsname   = '%s_%d' % (prefix, next(_shim_count))
+        self.cpptypes = tuple(cpptypes)
+        self.params   = ', '.join('%s a%d' % (t, i) for i, t in enumerate(self.cpptypes))
+        self.args     = ', '.join('a%d' % i for i in range(len(self.cpptypes)))
+        self.sep      = self.cpptypes and ', ' or ''
+        self.declare("""auto call(intptr_t self%(sep)s%(params)s) -> decltype(%(call)s) { (void)self; return %(call)s; }
+typedef decltype(call(0%(sep)s%(declvals)s)) R;
+%(extra)s""" % {'sep' : self.sep, 'params' : self.params, 'call' : call % self.args, 'extra' : extra,
+                'declvals' : ', '.join('std::declval<%s>()' % t for t in self.cpptypes)})
+      # (by name, as __cppyy_internal would be mangled in a class body)
+        self.ns = getattr(getattr(cppyy.gbl, '__cppyy_internal'), self.nsname)
+
+    def declare(self, code):
+        import cppyy
+        cppyy._cppdef('namespace __cppyy_internal { namespace %s {\n%s\n} }' % (self.nsname, code))
+
+
+def _class_of(cpptype):
+    import cppyy
+    name = cpptype
+    if name.startswith('::'):
+        name = name[2:]
+    try:
+        cls = cppyy._resolve(name)
+    except Exception:
+        return None
+    if isinstance(cls, type) and hasattr(cls, '__cpp_name__'):
+        return cls
+    return None
+
+
+def _arg_conversion(i, cpptype, classes):
+    """Returns C++ code converting args[<i>] into variable a<i>, and the
+    expression to pass for it."""
+    base = cpptype
+    if base.startswith('const ') and base.endswith('&') and not base.endswith('&&'):
+        base = base[6:-1]
+
+    err = 'return nullptr;'
+    if base == 'bool':
+        return 'int a%d = PyObject_IsTrue(args[%d]); if (a%d < 0) %s' % (i, i, i, err), '(bool)a%d' % i
+    if base in _signed_types or base in _unsigned_types:
+        if base in _signed_types:
+            conv, ll = 'PyLong_AsLongLong', 'long long'
+        else:
+            conv, ll = 'PyLong_AsUnsignedLongLong', 'unsigned long long'
+        code = '%(ll)s a%(i)d = %(conv)s(args[%(i)d]); if (a%(i)d == (%(ll)s)-1 && PyErr_Occurred()) %(err)s' % locals()
+        if base not in ('long long', 'unsigned long long'):
+            code += '\n    if (a%(i)d < (%(ll)s)std::numeric_limits<%(base)s>::min() || (%(ll)s)std::numeric_limits<%(base)s>::max() < a%(i)d) {' \
+                    ' PyErr_SetString(PyExc_OverflowError, "argument %(n)d out of range for %(base)s"); %(err)s }' % dict(locals(), n=i+1)
+        return code, '(%s)a%d' % (base, i)
+    if base in _float_types:
+        return 'double a%d = PyFloat_AsDouble(args[%d]); if (a%d == -1. && PyErr_Occurred()) %s' % (i, i, i, err), \
+               '(%s)a%d' % (base, i)
+    if base in _string_types:
+        return 'Py_ssize_t n%d; const char* s%d = PyUnicode_AsUTF8AndSize(args[%d], &n%d); if (!s%d) %s\n' \
+               '    std::string a%d(s%d, n%d);' % (i, i, i, i, i, err, i, i, i), 'a%d' % i
+    if base == 'const char*':
+        return 'const char* a%d = PyUnicode_AsUTF8(args[%d]); if (!a%d) %s' % (i, i, i, err), 'a%d' % i
+
+  # instances of C++ classes, by pointer, reference, or value
+    is_ptr = base.endswith('*') and not base.endswith('**')
+    clsname = base.rstrip('*&')
+    if clsname.startswith('const '):
+        clsname = clsname[6:]
+    cls = _class_of(clsname)
+    if cls is None:
+        raise TypeError('unsupported argument type "%s"' % cpptype)
+    idx = len(classes)
+    classes.append(cls)
+    code = '%(clsname)s* a%(i)d = nullptr;\n' \
+           '    if (Py_TYPE(args[%(i)d]) == (PyTypeObject*)PyTuple_GET_ITEM(s_classes, %(idx)d))\n' \
+           '        a%(i)d = (%(clsname)s*)CPyCppyy::Instance_AsVoidPtr(args[%(i)d]);\n' % locals()
+    if is_ptr:
+        code += '    else if (args[%(i)d] != Py_None) {' % locals()
+    else:
+        code += '    else {'
+    code += ' PyErr_SetString(PyExc_TypeError, "argument %d must be exactly of type %s"); %s }' % (i+1, clsname, err)
+    if is_ptr:
+        return code, 'a%d' % i
+    code += '\n    if (!a%d) { PyErr_SetString(PyExc_ReferenceError, "attempt to access a null-pointer"); %s }' % (i, err)
+    if base.endswith('&&'):
+        return code, 'std::move(*a%d)' % i
+    return code, '*a%d' % i
+
+def _return_conversion(cpptype, call):
+    """Returns C++ code that makes the call and converts its result."""
+    base = _normalize(cpptype)
+    if base.startswith('const ') and base.endswith('&'):
+        base = base[6:-1]
+
+    if base == 'void':
+        return '%s;\n    Py_RETURN_NONE;' % call
+    if base == 'bool':
+        return 'return PyBool_FromLong((long)%s);' % call
+    if base in _signed_types:
+        return 'return PyLong_FromLongLong((long long)%s);' % call
+    if base in _unsigned_types:
+        return 'return PyLong_FromUnsignedLongLong((unsigned long long)%s);' % call
+    if base in _float_types:
+        return 'return PyFloat_FromDouble((double)%s);' % call
+    if base in _string_types:
+        return 'const std::string& r = %s;\n' \
+               '    return PyUnicode_FromStringAndSize(r.data(), r.size());' % call
+    if base == 'const char*':
+        return 'const char* r = %s;\n    if (!r) Py_RETURN_NONE;\n' \
+               '    return PyUnicode_FromString(r);' % call
+
+    clsname = base.rstrip('*&')
+    if clsname.startswith('const '):
+        clsname = clsname[6:]
+    if _class_of(clsname) is None:
+        raise TypeError('unsupported return type "%s"' % cpptype)
+    if base.endswith('*'):
+        return 'return CPyCppyy::Instance_FromVoidPtr((void*)%s, "%s", false);' % (call, clsname)
+    if base.endswith('&'):
+        return 'return CPyCppyy::Instance_FromVoidPtr((void*)&%s, "%s", false);' % (call, clsname)
+    return 'return CPyCppyy::Instance_FromVoidPtr(new %s(%s), "%s", true);' % (clsname, call, clsname)
+
+
+_trampoline_count = itertools.count()
+_helpers_declared = False
+
+def _declare_helpers():
+    global _helpers_declared
+    if _helpers_declared:
+        return
+    import cppyy
+    cppyy._cppdef("""#include "CPyCppyy/API.h"
+namespace __cppyy_internal {
+struct trampoline_release_gil {
+    PyThreadState* fState;
+    trampoline_release_gil() : fState(PyEval_SaveThread()) {}
+    ~trampoline_release_gil() { PyEval_RestoreThread(fState); }
+};
+
+// C++ exceptions are rethrown from a call through cppyy, which translates them
+// as for any other call (the GIL is held, so a single slot suffices)
+static std::exception_ptr trampoline_error;
+void trampoline_rethrow() {
+    std::exception_ptr e;
+    std::swap(e, trampoline_error);
+    std::rethrow_exception(e);
+} }""")
+    _helpers_declared = True
+
+def _compile(name, pyname, params, rettype, is_method, release_gil):
+    import cppyy
+    _declare_helpers()
+
+    classes, convs, passed = list(), list(), list()
+    offset = is_method and 1 or 0
+    if is_method:
+        scope = _class_of(name.rsplit('::', 1)[0])
+        if scope is None:
+            raise TypeError('can not determine the class of %s' % name)
+        convs.append(_arg_conversion(0, scope.__cpp_name__+'&', classes)[0])
+    for i, p in enumerate(params):
+        code, expr = _arg_conversion(i+offset, p, classes)
+        convs.append(code)
+        passed.append(expr)
+
+    if is_method:
+        call = 'a0->%s(%s)' % (name.rsplit('::', 1)[1], ', '.join(passed))
+    else:
+        call = '%s(%s)' % (name, ', '.join(passed))
+
+    if not release_gil:
+        ret = _return_conversion(rettype, call)
+    elif _normalize(rettype) == 'void':
+        ret = '{ trampoline_release_gil g; %s; }\n    Py_RETURN_NONE;' % call
+    else:
+      # only the C++ call itself runs without the GIL, the conversions need it
+        ret = 'auto&& res = [&]() -> decltype(auto) { trampoline_release_gil g; return %s; }();\n    ' % call
+        ret += _return_conversion(rettype, 'std::forward<decltype(res)>(res)')
+
+    nsname = 'trampoline_%d' % next(_trampoline_count)
+    nargs = len(params)+offset
+    cppyy._cppdef("""namespace __cppyy_internal { namespace %(nsname)s {
+static PyObject* s_classes = nullptr;
+static PyObject* s_rethrow = nullptr;
+static PyObject* call(PyObject*, PyObject* const* args, Py_ssize_t nargs) {
+    if (nargs != %(nargs)d) {
+        PyErr_Format(PyExc_TypeError, "%(pyname)s() takes exactly %(nargs)d arguments (%%d given)", (int)nargs);
+        return nullptr;
+    }
+    %(convs)s
+    try {
+    %(ret)s
+    } catch (...) {
+        trampoline_error = std::current_exception();
+        Py_XDECREF(PyObject_CallObject(s_rethrow, nullptr));
+    }
+    return nullptr;
+}
+static PyMethodDef s_def = {"%(pyname)s", (PyCFunction)(void(*)(void))call, METH_FASTCALL, nullptr};
+PyObject* make(PyObject* classes, PyObject* rethrow) {
+    Py_INCREF(classes);
+    s_classes = classes;
+    Py_INCREF(rethrow);
+    s_rethrow = rethrow;
+    return PyCFunction_New(&s_def, nullptr);
+} } }""" % {'nsname' : nsname, 'nargs' : nargs, 'pyname' : pyname,
+            'convs' : '\n    '.join(convs), 'ret' : ret})
+
+  # (by name, as __cppyy_internal would be mangled in a class body)
+    internal = getattr(cppyy.gbl, '__cppyy_internal')
+    return getattr(internal, nsname).make(tuple(classes), internal.trampoline_rethrow)
+
+
+def compile_call(func, signature, release_gil=False):
+    """Returns a Python callable that calls the overload of C++ function <func>
+    that matches <signature> (as in __overload__), through a JITed trampoline
+    that converts arguments and result inline, by-passing the generic call
+    machinery. Arguments must match the signature exactly: builtin types,
+    std::string and const char*, and exact instances of C++ classes (by value,
+    pointer, or reference) are supported. For methods, the instance is passed
+    as the first argument. If <release_gil>, the GIL is released for the
+    duration of the C++ call.
+    """
+    from . import reflex
+
+    ol = func.__overload__(signature)   # verifies that the overload exists
+    params = _split_signature(signature)
+    rettype = ol.__cpp_reflex__(reflex.RETURN_TYPE, reflex.AS_STRING)
+
+  # only non-static methods of classes (not namespaces) need an instance
+    is_method = not func.im_class.__cpp_reflex__(reflex.IS_NAMESPACE) and \
+                not ol.__doc__.startswith('static ')
+    return _compile(_func_cpp_name(func), func.__name__, params, rettype, is_method, release_gil)
@@ -0,0 +1,97 @@
+""" Thread-safe caching of type information (sizes, RTTI, etc.).
+"""
+
+import collections
+import threading
+
+__all__ = [
+    'TypeInfoCache',
+    ]
+
+
+class TypeInfoCache(object):
+    """Memoizes <resolve>(key) for hashable keys (types or type names).
+
+    Hits are served without locking. Concurrent misses for the same key are
+    resolved only once (by the first thread, while the others wait for its
+    result), so that e.g. JITed declarations are not duplicated. If <maxsize>
+    is set, the least recently used entries are evicted beyond that size.
+    """
+
+    def __init__(self, resolve, maxsize=None):
+        self._resolve  = resolve
+        self._maxsize  = maxsize
+        self._data     = collections.OrderedDict()
+        self._lock     = threading.Lock()
+        self._inflight = dict()
+
+    def __call__(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            return self._miss(key)
+        if self._maxsize is not None:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                pass                # evicted in the meantime by another thread
+        return value
+
+    def _miss(self, key):
+        with self._lock:
+            try:
+                return self._data[key]
+            except KeyError:
+                pass
+            done = self._inflight.get(key)
+            leader = done is None
+            if leader:
+                done = self._inflight[key] = threading.Event()
+
+        if not leader:
+            done.wait()
+            try:
+                return self._data[key]
+            except KeyError:
+                return self._resolve(key)       # leader failed: report own error
+
+        try:
+            value = self._resolve(key)
+            with self._lock:
+                self._data[key] = value
+                self._evict()
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+
+    def setdefault(self, key, value):
+        """Insert a value resolved elsewhere (e.g. in bulk), unless present."""
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = value
+                self._evict()
+            return self._data.get(key, value)
+
+    def _evict(self):
+        # called with the lock held
+        if self._maxsize is not None:
+            while self._maxsize < len(self._data):
+                self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def set_maxsize(self, maxsize):
+        """Set the maximum number of entries (None for no limit)."""
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,96 @@
+""" cppyy extensions for asyncio: awaitable calls of C++ functions, which run
+on a managed executor with the GIL released, keeping the event loop responsive
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import threading
+
+__all__ = [
+    'call',
+    'async_',
+    'set_executor',
+    ]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+              # sized as for I/O bound work (the default of the thread pool), as
+              # C++ calls that are awaited typically block rather than compute
+                _executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='cppyy-aio')
+    return _executor
+
+def set_executor(executor):
+    """Use <executor> (a concurrent.futures.Executor) to run C++ calls. If
+    None, a thread pool (with the default number of workers) is created on
+    first use. The executor previously in use is not shut down.
+    """
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+# GIL-releasing copies, made once per overload set: keyed on the hash of the
+# set (the address of the method info that all its bound copies share), and
+# stored with an unbound reference to the set, which keeps that address taken
+_twins = dict()
+
+def _without_gil(func):
+    """Returns a copy of C++ function <func> that releases the GIL, leaving
+    the flags of <func> itself (which are shared with other users) unchanged."""
+    self = getattr(func, 'im_self', None)
+    try:
+        owner, twin = _twins[hash(func)]
+    except (KeyError, TypeError):
+        try:
+            twin = func.__overload__(':any:')
+        except (AttributeError, LookupError, TypeError):
+            return func         # not a C++ overload set: call as-is
+        twin.__release_gil__ = True
+        owner = func
+        if self is not None:
+            twin  = twin.__get__(None, type(self))     # bound per call below
+            owner = getattr(type(self), func.__name__, None)
+        if owner is not None and hash(owner) == hash(func):
+            _twins[hash(func)] = (owner, twin)
+    if self is not None:
+        return twin.__get__(self)
+    return twin
+
+try:
+    _get_running_loop = asyncio.get_running_loop
+except AttributeError:      # Python 3.6: the same from within a coroutine
+    _get_running_loop = asyncio.get_event_loop
+
+async def _call(func, args, kwds):
+    loop = _get_running_loop()
+    future = _get_executor().submit(functools.partial(func, *args, **kwds))
+  # a call that has not started yet is dropped on cancellation; a running C++
+  # call can not be interrupted, so it completes and its result is discarded
+    return await asyncio.wrap_future(future, loop=loop)
+
+def call(func, *args, **kwds):
+    """Returns an awaitable for the result of calling C++ function <func> with
+    <args> (and <kwds>). The call runs on the cppyy executor with the GIL
+    released, and goes through the normal overload resolution, argument
+    conversions, and exception translations (incl. add_exception_mapping).
+    """
+    return _call(_without_gil(func), args, kwds)
+
+def async_(func):
+    """Wraps C++ function (or bound method) <func> into a coroutine function
+    that executes it as call() does.
+    """
+    func = _without_gil(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwds):
+        return await _call(func, args, kwds)
+    return wrapper
@@ -55,7 +55,7 @@ del _name
 
 
 # create low-level helpers
-cppyy.cppdef("""namespace __cppyy_internal {
+cppyy._cppdef("""namespace __cppyy_internal {
 // type casting
     template<typename T, typename U>
     T cppyy_cast(U val) { return (T)val; }
@@ -79,6 +79,7 @@ cppyy.cppdef("""namespace __cppyy_internal {
     template<typename T>
     void cppyy_array_delete(T* ptr) { delete[] ptr; }
 }""")
+cppyy._startup.mark('ll_helpers')
 
 
 # helper for sizing arrays
@@ -4,20 +4,29 @@
 import cppyy
 import cppyy.types as cpp_types
 import cppyy.reflex as cpp_refl
+from cppyy._trampoline import _func_cpp_name, _normalize, _split_signature, \
+                             _cpp_types, _declare_typecode
 
-import numba
 import numba.extending as nb_ext
 import numba.core.cgutils as nb_cgu
 import numba.core.datamodel as nb_dm
+import numba.core.errors as nb_errors
 import numba.core.imputils as nb_iutils
 import numba.core.registry as nb_reg
 import numba.core.typing.templates as nb_tmpl
 import numba.core.types as nb_types
 import numba.core.typing as nb_typing
+import numba.np.arrayobj as nb_arrayobj
+import numba.np.numpy_support as nb_npsupport
 
 from llvmlite import ir
+import llvmlite.binding as llvm
 from numba.extending import make_attribute_wrapper
+import ctypes
+import itertools
+import numpy as np
 import re
+import warnings
 
 # setuptools entry point for Numba
 def _init_extension():
@@ -76,13 +85,19 @@ def cpp2numba(val):
         #  ref cases makes the RETURN_TYPE from reflex a string
         return typeof_scope(val, nb_typing.typeof.Purpose.argument, Qualified.value)
     elif val.startswith("std::vector"):
-        type_arr = getattr(numba, str(cpp2numba(resolve_std_vector(val))))[:]
-        return type_arr
+      # std::vector (or a pointer to one) is exposed as a borrowed view on its data
+        return nb_types.Array(cpp2numba(resolve_std_vector(val)), 1, 'C')
     elif val[-1] == '*' or val[-1] == '&':
         if val.startswith('const'):
             return nb_types.CPointer(cpp2numba(resolve_const_types(val)))
         return nb_types.CPointer(_cpp2numba[val[:-1]])
-    return _cpp2numba[val]
+    try:
+        return _cpp2numba[val]
+    except KeyError:
+        nbtype = builtin_type(val)          # e.g. a typedef such as size_t
+        if not isinstance(nbtype, (nb_types.Integer, nb_types.Float)):
+            raise
+        return nbtype
 
 _numba2cpp = dict()
 for key, value in _cpp2numba.items():
@@ -90,45 +105,32 @@ for key, value in _cpp2numba.items():
 # prefer "int" in the case of intc over "int32_t"
 _numba2cpp[nb_types.intc] = 'int'
 
+def literal_type(val):
+    """Numba type of literal <val> as typed in C++: an integer literal is an
+    int if its value fits, otherwise the type of the Numba literal."""
+    if isinstance(val, nb_types.IntegerLiteral) and \
+            nb_types.intc.minval <= val.literal_value <= nb_types.intc.maxval:
+        return nb_types.intc
+    return val.literal_type
+
 def numba2cpp(val):
-    if hasattr(val, 'literal_type'):
-        val = val.literal_type
-        if val == nb_types.int64:      # Python int
-            # TODO: this is only necessary until "best matching" is in place
-            val = nb_types.intc        # more likely match candidate
-    elif isinstance(val, numba.types.CPointer):
-        return _numba2cpp[val.dtype]
-    elif isinstance(val, numba.types.RawPointer):
+    if isinstance(val, nb_types.Literal):
+        val = literal_type(val)
+    if isinstance(val, nb_types.CPointer):
+        return _numba2cpp[val.dtype]+'*'
+    elif isinstance(val, nb_types.RawPointer):
         return _numba2cpp[nb_types.voidptr]
-    elif isinstance(val, numba.types.Array):
+    elif isinstance(val, nb_types.Array):
         return "std::vector<" + _numba2cpp[val.dtype] + ">"
     elif isinstance(val, CppClassNumbaType):
         return val._scope.__cpp_name__
-    else:
-        try:
-            return _numba2cpp[val]
-        except:
-            raise RuntimeError("Type mapping failed from Numba to C++ for ", val)
+    try:
+        return _numba2cpp[val]
+    except KeyError:
+        raise RuntimeError("Type mapping failed from Numba to C++ for %s" % val)
 
 def numba_arg_convertor(args):
-    args_cpp = []
-    for arg in list(args):
-        # If the user explicitly passes an argument using numba CPointer, the regex match is used
-        # to detect the pass by reference since the dispatcher always returns typeref[val*]
-        match = re.search(r"typeref\[(.*?)\*\]", str(arg))
-        if match:
-            literal_val = match.group(1)
-            arg_type = numba.typeof(eval(literal_val))
-            args_cpp.append(to_ref(numba2cpp(arg_type)))
-        else:
-            args_cpp.append(numba2cpp(arg))
-    return tuple(args_cpp)
-
-def to_ref(type_list):
-    ref_list = []
-    for l in type_list:
-        ref_list.append(l + '&')
-    return ref_list
+    return tuple(numba2cpp(arg) for arg in args)
 
 # TODO: looks like Numba treats unsigned types as signed when lowering,
 # which seems to work as they're just reinterpret_casts
@@ -157,14 +159,441 @@ def cpp2ir(val):
         return _cpp2ir[val]
     except KeyError:
         if val.startswith("std::vector"):
-            ## TODO should be possible to obtain the vector length from the CPPDataMember val
-            type_arr = ir.VectorType(cpp2ir(resolve_std_vector(val)), 3)
-            return type_arr
+          # begin, end, and end of storage pointers (see vector_layout_ok())
+            type_vec = ir.LiteralStructType([ir.PointerType(cpp2ir(resolve_std_vector(val)))]*3)
+            if val[-1] == "*":
+                return ir.PointerType(type_vec)
+            return type_vec
         elif val != "char*" and val[-1] == "*":
             if val.startswith('const'):
                 return ir.PointerType(cpp2ir(resolve_const_types(val)))
             type_2 = _cpp2ir[val[:-1]]
             return ir.PointerType(type_2)
+        nbtype = builtin_type(val)
+        if isinstance(nbtype, nb_types.Integer):
+            return ir.IntType(nbtype.bitwidth)
+        elif nbtype == nb_types.float32:
+            return ir.FloatType()
+        elif nbtype == nb_types.float64:
+            return ir.DoubleType()
+
+#
+# NumPy arrays <-> std::vector and pointer arguments
+#
+_vector_layout = None
+def vector_layout_ok():
+    """Whether std::vector is laid out as begin, end, and end of storage
+    pointers, so that borrowed views can be created in either direction."""
+    global _vector_layout
+    if _vector_layout is None:
+        cppyy._cppdef("""namespace __cppyy_internal {
+bool numba_vector_layout() {
+    std::vector<int> v{1, 2, 3}; v.reserve(8);
+    int* const* p = (int* const*)&v;
+    return sizeof(v) == 3*sizeof(int*) && \
+        p[0] == v.data() && p[1] == v.data()+v.size() && p[2] == v.data()+v.capacity();
+} }""")
+        _vector_layout = bool(cppyy.gbl.__cppyy_internal.numba_vector_layout())
+    return _vector_layout
+
+def array_data(context, builder, aryty, val):
+    """Data pointer of array <val>, for T* arguments."""
+    return context.make_array(aryty)(context, builder, value=val).data
+
+def array_as_vector(context, builder, aryty, val):
+    """Pointer to a std::vector on the stack that borrows the data of array
+    <val>, for const std::vector<T>& arguments (the callee can not resize a
+    const vector, and the stack copy is never destroyed)."""
+    ary = context.make_array(aryty)(context, builder, value=val)
+    begin = ary.data
+    end = builder.gep(begin, [ary.nitems])
+    vec = nb_cgu.alloca_once(builder, ir.LiteralStructType([begin.type]*3))
+    for i, ptr in enumerate((begin, end, end)):
+        builder.store(ptr, nb_cgu.gep_inbounds(builder, vec, 0, i))
+    return builder.bitcast(vec, ir_voidptr)
+
+def vector_as_array(context, builder, aryty, pvec):
+    """Array that borrows the data of the std::vector at address <pvec>."""
+    elemty = context.get_data_type(aryty.dtype)
+    ptrs = builder.bitcast(pvec, ir.PointerType(elemty.as_pointer()))
+    begin = builder.load(ptrs)
+    end = builder.load(builder.gep(ptrs, [ir.Constant(ir_intptr_t, 1)]))
+    itemsize = context.get_abi_sizeof(elemty)
+    nbytes = builder.sub(builder.ptrtoint(end, ir_intptr_t), builder.ptrtoint(begin, ir_intptr_t))
+    nitems = builder.sdiv(nbytes, ir.Constant(ir_intptr_t, itemsize))
+
+    ary = context.make_array(aryty)(context, builder)
+    nb_arrayobj.populate_array(ary, data=begin, shape=[nitems],
+                               strides=[ir.Constant(ir_intptr_t, itemsize)],
+                               itemsize=itemsize, meminfo=None)
+    return ary._getvalue()
+
+def equivalent_spellings(cppname):
+    """C++ spellings of builtin <cppname> for matching in __overload__: all
+    names that map onto the same Numba type, <cppname> first."""
+    try:
+        nbtype = _cpp2numba[cppname]
+    except (KeyError, TypeError):
+        return (cppname,)
+    names = [k for k, v in _cpp2numba.items() if v == nbtype and k[-1] != '*']
+    plain = [k for k in names if not k.endswith('_t')]     # typedefs do not match
+    return (cppname,)+tuple(k for k in (plain or names) if k != cppname)
+
+def array_spellings(aryty):
+    """C++ parameter spellings that a contiguous array can be passed as."""
+    if aryty.layout not in ('C', 'F'):
+        return ()
+    spellings = list()
+    for elem in equivalent_spellings(numba2cpp(aryty.dtype)):
+        if aryty.ndim == 1 and vector_layout_ok():
+            spellings.append('const std::vector<%s>&' % elem)
+        spellings += ['const %s*' % elem, '%s*' % elem]
+    return tuple(spellings)
+
+#
+# overload resolution: rank the implicit conversions of the Numba argument types
+# to the parameter types of all C++ overloads and select the best match
+#
+EXACT, PROMOTION, CONVERSION, FLOAT_INTEGRAL = range(4)
+
+# Numba types for the typecodes of C++ builtins (long double and complex types
+# have no Numba equivalent)
+_typecodes = dict((c, nb_npsupport.from_dtype(np.dtype(c))) for c in _cpp_types if not c in 'gFD')
+
+_builtin_types = dict()
+def builtin_type(cpptype):
+    """Numba type of C++ builtin (or typedef thereof, e.g. size_t) <cpptype>,
+    or None if it is not a builtin number type."""
+    try:
+        return _builtin_types[cpptype]
+    except KeyError:
+        pass
+
+    nbtype = _cpp2numba.get(cpptype)
+    if nbtype is None:
+        _declare_typecode()
+        try:
+            nbtype = _typecodes.get(cppyy.gbl.__cppyy_internal.typecode[cpptype]())
+        except Exception:
+            pass                # not a type, or not instantiable
+    elif not isinstance(nbtype, (nb_types.Integer, nb_types.Float)):
+        nbtype = None
+
+    _builtin_types[cpptype] = nbtype
+    return nbtype
+
+def numeric_rank(arg, target):
+    if target is None:
+        return None
+    if arg == target:
+        return EXACT
+    if isinstance(arg, nb_types.Boolean):
+        if isinstance(target, nb_types.Integer):
+            return target == nb_types.intc and PROMOTION or CONVERSION
+        return FLOAT_INTEGRAL
+    if isinstance(arg, nb_types.Integer):
+        if isinstance(target, nb_types.Integer):
+          # widening that preserves all values
+            if arg.bitwidth < target.bitwidth and (target.signed or not arg.signed):
+                return PROMOTION
+            return CONVERSION
+        return FLOAT_INTEGRAL
+    if isinstance(arg, nb_types.Float):
+        if isinstance(target, nb_types.Float):
+            return arg.bitwidth < target.bitwidth and PROMOTION or CONVERSION
+        return FLOAT_INTEGRAL
+    return None
+
+def vector_element(cpptype):
+    """Element type of std::vector <cpptype>, or None for other types."""
+    if cpptype.split('<', 1)[0] not in ('std::vector', 'vector') or cpptype[-1] != '>':
+        return None
+    return _split_signature(cpptype[cpptype.index('<')+1:-1])[0]
+
+def conversion_rank(arg, param):
+    """Rank of the implicit conversion of Numba type <arg> to C++ parameter type
+    <param> (lower is better), or None if there is no such conversion."""
+    base, is_ref, is_const = param, False, False
+    if base.endswith('&') and not base.endswith('&&'):
+        base, is_ref = base[:-1], True
+    if base.startswith('const '):
+        base, is_const = base[6:], True
+
+    if isinstance(arg, nb_types.Literal):
+        arg = literal_type(arg)
+
+    if isinstance(arg, (nb_types.Boolean, nb_types.Integer, nb_types.Float)):
+        if is_ref and not is_const:
+            return None         # can not bind a temporary
+        return numeric_rank(arg, builtin_type(base))
+
+    if isinstance(arg, nb_types.CPointer):
+        if is_ref:              # pointer to pass by reference
+            return builtin_type(base) == arg.dtype and PROMOTION or None
+        if base == 'void*':
+            return CONVERSION
+        if base.endswith('*') and builtin_type(base[:-1]) == arg.dtype:
+            return EXACT
+        return None
+
+    if isinstance(arg, nb_types.RawPointer):
+        if not is_ref and base == 'void*':
+            return EXACT
+        return None
+
+    if isinstance(arg, nb_types.Array):
+        if arg.layout not in ('C', 'F'):
+            return None
+        elem = vector_element(base)
+        if elem is not None:
+            if is_ref and is_const and arg.ndim == 1 and vector_layout_ok() and \
+                    builtin_type(elem) == arg.dtype:
+                return EXACT
+            return None
+        if not is_ref and base.endswith('*') and builtin_type(base[:-1]) == arg.dtype:
+            return PROMOTION
+        return None
+
+    if isinstance(arg, CppRecordType):
+      # records are pointers to their data, so pass by pointer or reference, but
+      # only to const, as the array may be shared across threads
+        if base.endswith('*'):
+            base, is_ref = base[:-1], True
+        if is_ref and is_const and base == _normalize(arg._scope.__cpp_name__):
+            return EXACT
+        return None
+
+    if isinstance(arg, CppClassNumbaType):
+      # proxies are passed by pointer, which is what references are at the ABI level
+        if base == _normalize(arg._scope.__cpp_name__):
+            return EXACT
+        return None
+
+    return None
+
+def _parameter_list(proto):
+    """Text between the parentheses that close prototype or function type
+    <proto>, or None if there are none."""
+    end = proto.rfind(')')
+    depth = 0
+    for start in range(end, -1, -1):
+        c = proto[start]
+        if c == ')':
+            depth += 1
+        elif c == '(':
+            depth -= 1
+            if depth == 0:
+                return proto[start+1:end]
+    return None
+
+def overload_parameters(ol):
+    """C++ types of the parameters of single overload <ol>, from its C++ type,
+    which is that of a pointer to it (e.g. "int (*)(int,double)")."""
+    return tuple(_split_signature(_parameter_list(ol.__cpp_name__)))
+
+_overloads = dict()
+def overloads(func):
+    """All overloads of <func>, each selected by its signature as listed in the
+    __doc__ string of <func>, with the C++ types of their parameters and their
+    default values. Where const and non-const overloads share a signature, the
+    non-const one is taken, as for calls on a non-const object."""
+    try:
+        return _overloads[func]
+    except KeyError:
+        pass
+
+    result, seen = list(), set()
+    if not isinstance(func, cpp_types.Function):
+        prototypes = ()         # template, which is matched by spelling
+    else:
+        prototypes = (func.__doc__ or '').split('\n')
+    for proto in prototypes:
+        sig = _parameter_list(proto)
+        if sig is None or sig in seen:
+            continue
+        seen.add(sig)
+        for want_const in (False, True):
+            try:
+                ol = func.__overload__(sig, want_const)
+            except LookupError:
+                continue
+            result.append((ol, overload_parameters(ol), ol.func_defaults or ()))
+            break
+    _overloads[func] = result
+    return result
+
+def default_arguments(params, defaults):
+    """Numba types and values of the defaulted trailing parameters <params>, or
+    None if a default can not be passed from Numba (only numbers by value)."""
+    result = list()
+    for param, value in zip(params, defaults[len(defaults)-len(params):]):
+        nbtype = builtin_type(param)
+        if nbtype is None or not isinstance(value, (int, float)):
+            return None
+        result.append((nbtype, value))
+    return tuple(result)
+
+def best_overload(func, args):
+    """Returns the overload of <func> with the best ranked conversions of Numba
+    <args> (fewest and least costly), the types of its parameters, and the
+    Numba types and values of the defaults of those not in <args>, or None if
+    no overload is viable. Raises TypingError if the best match is ambiguous."""
+    best, best_rank, ambiguous = None, None, False
+    for ol, params, defaults in overloads(func):
+        if not len(params)-len(defaults) <= len(args) <= len(params):
+            continue
+        ranks = [conversion_rank(arg, param) for arg, param in zip(args, params)]
+        if None in ranks:
+            continue
+        omitted = default_arguments(params[len(args):], defaults)
+        if omitted is None:
+            continue
+        rank = (sum(ranks), max(ranks or [EXACT]))
+        if best_rank is None or rank < best_rank:
+            best, best_rank, ambiguous = (ol, params, omitted), rank, False
+        elif rank == best_rank:
+            ambiguous = True
+    if ambiguous:
+        raise nb_errors.TypingError('call of overloaded %s is ambiguous for %s' % (func.__name__, args))
+    return best
+
+_max_candidates = 256       # beyond this many signatures, only try the first
+
+def match_overload(func, args):
+    """Returns the overload of <func> that matches Numba <args>, the C++
+    spellings of the matched parameters, and the Numba types and values of the
+    defaults to pass for omitted ones: the best ranked of the existing overloads
+    or else, e.g. for templates, the first overload found by the C++ spelling
+    of <args>."""
+    best = best_overload(func, args)
+    if best is not None:
+        return best
+
+    for arg in args:
+        if isinstance(arg, CppRecordType):
+            raise nb_errors.TypingError('no C++ overload for %s (%s elements bind '
+                'only to const references or pointers)' % (args, arg._scope.__cpp_name__))
+
+    candidates = list()
+    for arg, cpparg in zip(args, numba_arg_convertor(args)):
+        if isinstance(arg, nb_types.Array):
+            candidates.append(array_spellings(arg))
+        else:
+            candidates.append(equivalent_spellings(cpparg))
+
+    ncandidates = 1
+    for sp in candidates:
+        ncandidates *= len(sp)
+    if _max_candidates < ncandidates:
+        candidates = [sp[:1] for sp in candidates]
+
+    error = LookupError('no C++ overload for %s' % (args,))
+    for sig in itertools.product(*candidates):
+        try:
+            return func.__overload__(sig), sig, ()
+        except (LookupError, TypeError) as e:
+            error = e
+    raise error
+
+def value_as_reference(context, builder, valty, val):
+    """Pointer to a copy of <val> on the stack, for const T& arguments."""
+    ptr = nb_cgu.alloca_once_value(builder, context.get_value_as_data(builder, valty, val))
+    return builder.bitcast(ptr, ir_voidptr)
+
+def external_argtype(arg, cpparg):
+    """Type that Numba <arg> is converted to when passed as <cpparg>, the type
+    passed to C++, and the lowering adaptor between the two."""
+    if isinstance(arg, nb_types.Array):
+        if cpparg[-1] == '&':
+            return arg, nb_types.voidptr, array_as_vector
+        return arg, nb_types.CPointer(arg.dtype), array_data
+    if isinstance(arg, (nb_types.Boolean, nb_types.Integer, nb_types.Float)):
+        if cpparg.endswith('&'):
+            return builtin_type(_normalize(cpparg[:-1].replace('const ', '', 1))), \
+                   nb_types.voidptr, value_as_reference
+        target = builtin_type(cpparg)
+        return target, target, None
+    return arg, arg, None
+
+
+#
+# relocatable references to C++ functions, for Numba's on-disk cache
+#
+def resolve_function(cppname):
+    """C++ function (or method) proxy by fully qualified name; constructors are
+    named <scope>::<class>, as in C++, and function template instances resolve
+    to their template (from which __overload__ selects the instance)."""
+    parts = cppyy._split_scoped_name(cppname)
+    name = parts[-1]
+    if 1 < len(parts) and parts[-2].split('<', 1)[0] == name:
+        ctor = getattr(cppyy._resolve('::'.join(parts[:-1])), '__init__', None)
+        if isinstance(ctor, cpp_types.Function):
+            return ctor
+    if name[-1] == '>' and not name.startswith('operator'):
+        parts[-1] = name[:name.index('<')]
+        cppname = '::'.join(parts)
+    return cppyy._resolve(cppname)
+
+class CppSymbol(object):
+    """External symbol in Numba-generated code for a C++ function, named after
+    its fully qualified C++ name and parameter spellings (<cppargs>) or, if
+    None, a CPyCppyy API function. The address is resolved through cppyy on
+    lowering and again, as part of the reload_init of the compile result, when
+    the code is loaded from Numba's on-disk cache in another process."""
+    __slots__ = ['name', 'cppname', 'cppargs']
+
+    def __init__(self, cppname, cppargs=None):
+        self.cppname = cppname
+        self.cppargs = cppargs
+        if cppargs is None:
+            self.name = 'cppyy.%s' % cppname
+        else:
+            self.cppargs = tuple(cppargs)
+            self.name = 'cppyy.%s(%s)' % (cppname, ', '.join(self.cppargs))
+
+    def __reduce__(self):
+        return (CppSymbol, (self.cppname, self.cppargs))
+
+    def __eq__(self, other):
+        return isinstance(other, CppSymbol) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def address(self):
+        if self.cppargs is None:
+            return cppyy.addressof(self.cppname)
+        return cppyy.addressof(resolve_function(self.cppname).__overload__(self.cppargs))
+
+    def __call__(self):
+        address = self.address()
+        if not address:
+            raise RuntimeError("unresolved address for %s" % self.name)
+        llvm.add_symbol(self.name, address)
+
+_unrelocatable = set()
+def external_function(context, builder, fnty, symbol, address):
+    """Function of type <fnty> at <address> for calling from the current
+    module: declared by the name of <symbol> if that resolves to <address>,
+    so that the code can be cached, otherwise as a (non-cachable) constant,
+    with a warning (once per symbol)."""
+    try:
+        reload_init = context.active_code_library._reload_init
+        relocatable = symbol.address() == address
+    except Exception:
+        relocatable = False
+    if not relocatable:
+        if not symbol in _unrelocatable:
+            _unrelocatable.add(symbol)
+            warnings.warn("%s can not be resolved by name: traces that call it can "
+                          "not be cached (cache=True)" % symbol.name, nb_errors.NumbaWarning)
+        ptrval = context.add_dynamic_addr(builder, address, info=symbol.name)
+        return builder.bitcast(ptrval, fnty.as_pointer())
+
+    llvm.add_symbol(symbol.name, address)
+    reload_init.add(symbol)
+    return nb_cgu.get_or_insert_function(builder.module, fnty, symbol.name)
+
 
 #
 # C++ function pointer -> Numba
@@ -182,7 +611,8 @@ class CppFunctionNumbaType(nb_types.Callable):
 
         self._signatures = list()
         self._impl_keys = dict()
-        self._arg_set_matched = tuple()
+        self._call_types = dict()
+        self._cppargs = None
         self.ret_type = None
 
     def is_precise(self):
@@ -190,12 +620,22 @@ class CppFunctionNumbaType(nb_types.Callable):
 
     def get_call_type(self, context, args, kwds):
         try:
-            return self._impl_keys[args].sig
+            return self._call_types[args]
         except KeyError:
             pass
 
-        ol = CppFunctionNumbaType(
-                self._func.__overload__(numba_arg_convertor(args)), self._is_method)
+        flush_refresh()
+
+        func, cppargs, defaults = match_overload(self._func, args)
+        ol = CppFunctionNumbaType(func, self._is_method)
+        ol._cppargs = cppargs
+        key, extargs, adaptors = args, (), ()
+        if args:
+          # the signature has the C++ parameter types, so Numba converts the
+          # actual arguments (incl. literals) before the call
+            args, extargs, adaptors = zip(*map(external_argtype, args, cppargs))
+      # defaults of omitted arguments are passed as constants
+        extargs += tuple(nbtype for nbtype, value in defaults)
 
         thistype = None
         if self._is_method:
@@ -207,25 +647,30 @@ class CppFunctionNumbaType(nb_types.Callable):
             args=args,
             recvr=thistype)
 
-        extsig = ol.sig
         if self._is_method:
             self.ret_type = ol.sig.return_type
             args = (nb_types.voidptr, *args)
-            extsig = nb_typing.Signature(
-                return_type=ol.sig.return_type, args=args, recvr=None)
-
-        self._impl_keys[args] = ol
-        self._arg_set_matched = numba_arg_convertor(args)
+            extargs = (nb_types.voidptr, *extargs)
+            adaptors = (None, *adaptors)
+        extsig = nb_typing.Signature(
+            return_type=ol.sig.return_type, args=extargs, recvr=None)
 
+      # the overload type is shared by all calls that select it, which may pass
+      # different numbers of arguments, so keep the signature per call
+        self._impl_keys[key] = self._impl_keys[args] = ol
+        self._call_types[key] = self._call_types[args] = ol.sig
 
         @nb_iutils.lower_builtin(ol, *args)
         def lower_external_call(context, builder, sig, args,
                 ty=nb_types.ExternalFunctionPointer(extsig, ol.get_pointer),
-                pyval=self._func, is_method=self._is_method):
+                pyval=self._func, is_method=self._is_method, adaptors=adaptors,
+                defaults=defaults, symbol=CppSymbol(_func_cpp_name(func), cppargs)):
             ptrty = context.get_function_pointer_type(ty)
-            ptrval = context.add_dynamic_addr(
-                builder, ty.get_pointer(pyval), info=str(pyval))
-            fptr = builder.bitcast(ptrval, ptrty)
+            fptr = external_function(
+                context, builder, ptrty.pointee, symbol, ty.get_pointer(pyval))
+            args = [val if adapt is None else adapt(context, builder, aty, val)
+                    for adapt, aty, val in zip(adaptors, sig.args, args)]
+            args += [context.get_constant(nbtype, value) for nbtype, value in defaults]
             return context.call_function_pointer(builder, fptr, args)
 
         return ol.sig
@@ -242,7 +687,10 @@ class CppFunctionNumbaType(nb_types.Callable):
         if func is None:
             func = self._func
 
-        ol = func.__overload__(numba_arg_convertor(self.sig.args))
+        cppargs = self._cppargs
+        if cppargs is None:
+            cppargs = numba_arg_convertor(self.sig.args)
+        ol = func.__overload__(cppargs)
 
         address = cppyy.addressof(ol)
         if not address:
@@ -253,6 +701,14 @@ class CppFunctionNumbaType(nb_types.Callable):
     def key(self):
         return self._func
 
+  # types are pickled into the index of Numba's on-disk cache, so rebuild them
+  # from the C++ name, rather than from the (process-specific) proxies
+    def __reduce__(self):
+        return (_rebuild_function_type, (_func_cpp_name(self._func), self._is_method))
+
+def _rebuild_function_type(cppname, is_method):
+    return CppFunctionNumbaType(resolve_function(cppname), is_method)
+
 
 @nb_ext.typeof_impl.register(cpp_types.Function)
 def typeof_function(val, c):
@@ -268,28 +724,72 @@ def typeof_template(val, c):
 class CppFunctionModel(nb_dm.models.PrimitiveModel):
     def __init__(self, dmm, fe_type):
       # the function pointer of this overload can not be exactly typed, but
-      # only the storage size is relevant, so simply use a void*
-        be_type = ir.PointerType(dmm.lookup(nb_types.void).get_value_type())
-        super(CppFunctionModel, self).__init__(dmm, fe_type, be_type)
+      # only the storage size is relevant, so simply use a void*, which is
+      # also the type of the object pointer that a method lookup yields
+        super(CppFunctionModel, self).__init__(dmm, fe_type, ir_voidptr)
 
 @nb_iutils.lower_constant(CppFunctionNumbaType)
 def constant_function_pointer(context, builder, ty, pyval):
-    # TODO: needs to exist for the proper flow, but why? The lowering of the
-    # actual overload is handled dynamically.
-    return
+  # calls are lowered from the type, which identifies the C++ function, so the
+  # value is not used, but it needs to be valid for storing in a variable (as
+  # is done in parallel loops)
+    return context.get_constant_null(ty)
+
+@nb_ext.unbox(CppFunctionNumbaType)
+def unbox_function(typ, obj, c):
+  # as for constants, the value of a function passed as an argument is not used
+    return nb_ext.NativeValue(c.context.get_constant_null(typ))
 
 
 #
 # C++ method / data member -> Numba
 #
 class CppDataMemberInfo(object):
-    __slots__ = ['f_name', 'f_offset', 'f_nbtype', 'f_irtype']
+    __slots__ = ['f_name', 'f_offset', 'f_cpptype', 'f_nbtype', 'f_irtype']
 
     def __init__(self, name, offset, cpptype):
-        self.f_name   = name
-        self.f_offset = offset
-        self.f_nbtype = cpp2numba(cpptype)
-        self.f_irtype = cpp2ir(cpptype)
+        self.f_name    = name
+        self.f_offset  = offset
+        self.f_cpptype = cpptype
+        self.f_nbtype  = cpp2numba(cpptype)
+        self.f_irtype  = cpp2ir(cpptype)
+
+
+class CppScopeInfo(object):
+    """Reflection information of a C++ class, collected once and shared by the
+    Numba types of all its qualifiers."""
+    __slots__ = ['data_members', 'field_index', 'member_methods', 'method_types',
+                 'const_method_types', 'sizeof', 'is_aggregate']
+
+    def __init__(self, scope):
+        self.data_members   = list()
+        self.member_methods = dict()
+        for name, field in scope.__dict__.items():
+            if isinstance(field, cpp_types.DataMember):
+                try:
+                    self.data_members.append(CppDataMemberInfo(
+                        name, field.__cpp_reflex__(cpp_refl.OFFSET), field.__cpp_reflex__(cpp_refl.TYPE))
+                    )
+                except (KeyError, AttributeError):
+                    pass        # no Numba equivalent, so not accessible in traces
+            elif isinstance(field, cpp_types.Function):
+                self.member_methods[name] = field.__cpp_reflex__(cpp_refl.RETURN_TYPE)
+
+        self.field_index  = {dmi.f_name : dmi for dmi in self.data_members}
+        self.method_types = dict()        # filled on use, see CppClassFieldResolver
+        self.const_method_types = dict()  # id., see CppRecordFieldResolver
+        self.sizeof       = cppyy.sizeof(scope)
+        self.is_aggregate = bool(scope.__cpp_reflex__(cpp_refl.IS_AGGREGATE))
+
+_scope_infos = dict()
+
+def scope_info(scope):
+    try:
+        return _scope_infos[scope]
+    except KeyError:
+        pass
+    info = _scope_infos[scope] = CppScopeInfo(scope)
+    return info
 
 
 #
@@ -329,34 +829,45 @@ class CppClassNumbaType(CppFunctionNumbaType):
     def key(self):
         return (self._scope, self._qualifier)
 
+    def __reduce__(self):
+        return (_rebuild_class_type, (self._scope.__cpp_name__, self._qualifier))
+
+def _rebuild_class_type(cppname, qualifier):
+    return typeof_scope(cppyy._resolve(cppname), None, qualifier)
+
 
 @nb_tmpl.infer_getattr
 class CppClassFieldResolver(nb_tmpl.AttributeTemplate):
     key = CppClassNumbaType
 
     def generic_resolve(self, typ, attr):
-        ft = typ.__dict__.get(attr, None)
-        if ft is not None:
-            return ft
+        flush_refresh()
+
+        info = scope_info(typ._scope)
+        dmi = info.field_index.get(attr)
+        if dmi is not None:
+          # std::vector data members are views on their data, which requires the
+          # expected layout and the object in place (values are copies)
+            if isinstance(dmi.f_nbtype, nb_types.Array) and \
+                    (typ.get_qualifier() != Qualified.default or not vector_layout_ok()):
+                raise nb_errors.TypingError('std::vector data member %s of %s can not be viewed '
+                    'as an array' % (attr, typ._scope.__cpp_name__))
+            return dmi.f_nbtype
 
         try:
-            f = getattr(typ._scope, attr)
-            if isinstance(f, cpp_types.Function):
-                ft = CppFunctionNumbaType(f, is_method=True)
-        except AttributeError:
+            return info.method_types[attr]
+        except KeyError:
             pass
 
+        ft = None
         try:
-            f = typ._scope.__dict__[attr]
-            if isinstance(f, cpp_types.DataMember):
-                ct = f.__cpp_reflex__(cpp_refl.TYPE)
-                ft = cpp2numba(ct)
+            f = getattr(typ._scope, attr)
+            if isinstance(f, cpp_types.Function):
+                ft = CppFunctionNumbaType(f, is_method=True)
         except AttributeError:
             pass
 
-        if ft is not None:
-            typ.__dict__[attr] = ft
-
+        info.method_types[attr] = ft
         return ft
 
 @nb_iutils.lower_getattr_generic(CppClassNumbaType)
@@ -364,16 +875,20 @@ def cppclass_getattr_impl(context, builder, typ, val, attr):
     # TODO: the following relies on the fact that numba will first lower the
     # field access, then immediately lower the call; and that the `val` loads
     # the struct representing the C++ object. Neither need be stable.
-    if attr in typ._scope.__dict__ and isinstance(typ._scope.__dict__[attr], cpp_types.DataMember):
-        dm = typ._scope.__dict__[attr]
-        ct = dm.__cpp_reflex__(cpp_refl.TYPE)
-        offset = dm.__cpp_reflex__(cpp_refl.OFFSET)
+    dmi = scope_info(typ._scope).field_index.get(attr)
+    if dmi is not None:
+        ct = dmi.f_cpptype
+        offset = dmi.f_offset
 
         q = typ.get_qualifier()
         if q == Qualified.default:
             llval = builder.bitcast(val, ir_byteptr)
             pfc = builder.gep(llval, [ir.Constant(ir_intptr_t, offset)])
-            pf = builder.bitcast(pfc, ir.PointerType(cpp2ir(ct)))
+            if ct.startswith("std::vector") and vector_layout_ok():
+                if ct[-1] == "*":
+                    pfc = builder.load(builder.bitcast(pfc, ir.PointerType(ir_byteptr)))
+                return vector_as_array(context, builder, dmi.f_nbtype, pfc)
+            pf = builder.bitcast(pfc, ir.PointerType(dmi.f_irtype))
             return builder.load(pf)
 
         elif q == Qualified.value:
@@ -386,7 +901,7 @@ def cppclass_getattr_impl(context, builder, typ, val, attr):
         # TODO: easier with inttoptr and ptrtoint (cgutils.pointer_add)?
         llval = builder.bitcast(val, ir_byteptr)
         pfc = builder.gep(llval, [ir.Constant(ir_intptr_t, offset)])
-        pf = builder.bitcast(pfc, ir.PointerType(cpp2ir(ct)))
+        pf = builder.bitcast(pfc, ir.PointerType(dmi.f_irtype))
         return builder.load(pf)
 
   # assume this is a method
@@ -401,7 +916,98 @@ def cppclass_getattr_impl(context, builder, typ, val, attr):
     return None
 
 
+# Numba types of C++ classes, one per class and qualifier: the class of the
+# Numba type selects the model, with the class-specific details taken from
+# the (memoized) reflection information of its scope
+class ImplClassType(CppClassNumbaType):
+    pass                    # proxied C++ objects, accessed by pointer
+
+class ImplAggregateValueType(CppClassNumbaType):
+    pass                    # C++ aggregates, by value
+
+class ImplClassValueType(CppClassNumbaType):
+    pass                    # other C++ objects, by value
+
+
+@nb_ext.register_model(ImplClassType)
+class ImplClassModel(nb_dm.models.StructModel):
+    def __init__(self, dmm, fe_type):
+        info = scope_info(fe_type._scope)
+        self._data_members = info.data_members
+        self._member_methods = info.member_methods
+
+      # TODO: eventually we need not derive from StructModel
+        members = [(dmi.f_name, dmi.f_nbtype) for dmi in self._data_members]
+        nb_dm.models.StructModel.__init__(self, dmm, fe_type, members)
+
+  # proxies are always accessed by pointer, which are not composites
+    def traverse(self, builder):
+        return []
+
+    def traverse_models(self):
+        return []
+
+    def traverse_types(self):
+        return [self._fe_type]      # from StructModel
+
+  # data: representation used when storing into containers (e.g. arrays).
+    # TODO ...
+
+  # value: representation inside function body. Maybe stored in stack.
+  #        The representation here are flexible.
+    def get_value_type(self):
+      # the C++ object, b/c through a proxy, is always accessed by pointer; it is
+      # represented as a pointer to POD to allow indexing by Numba for data member
+      # type checking, but the address offsetting for loading data member values is
+      # independent (see get(), below), so the exact layout need not match a POD
+
+      # TODO: this doesn't work for real PODs, b/c those are unpacked into their elements
+      # and passed through registers
+        return ir.PointerType(super(ImplClassModel, self).get_value_type())
+
+  # argument: representation used for function argument. Needs to be builtin type,
+  #           but unlike other Numba composites, C++ proxies are not flattened.
+    def get_argument_type(self):
+        return self.get_value_type()
+
+    def as_argument(self, builder, value):
+        return value
+
+    def from_argument(self, builder, value):
+        return value
+
+  # return: representation used for return argument.
+    # TODO ...
+
+  # access to public data members
+    def get(self, builder, val, pos):
+        """Get a field at the given position/field name"""
+
+        if isinstance(pos, str):
+            pos = self.get_field_position(pos)
+
+        dmi = self._data_members[pos]
+
+        llval = builder.bitcast(val, ir_byteptr)
+        pfc = builder.gep(llval, [ir.Constant(ir_intptr_t, dmi.f_offset)])
+        pf = builder.bitcast(pfc, ir.PointerType(dmi.f_irtype))
+
+        return builder.load(pf)
+
+
+@nb_ext.register_model(ImplAggregateValueType)
 class ImplAggregateValueModel(nb_dm.models.StructModel):
+    def __init__(self, dmm, fe_type):
+        info = scope_info(fe_type._scope)
+        self._data_members = info.data_members
+        self._member_methods = info.member_methods
+        self._sizeof = info.sizeof
+
+      # TODO: this code exists purely to be able to use the indexing and hierarchy
+      # of the base class StructModel, which isn't much of a reason
+        members = [(dmi.f_name, dmi.f_nbtype) for dmi in self._data_members]
+        nb_dm.models.StructModel.__init__(self, dmm, fe_type, members)
+
     def get(self, builder, val, pos):
         """Get a field at the given position/field name"""
 
@@ -421,7 +1027,10 @@ class ImplAggregateValueModel(nb_dm.models.StructModel):
 
         return builder.load(pf)
 
+@nb_ext.register_model(ImplClassValueType)
 class ImplClassValueModel(ImplAggregateValueModel):
+    _data_type = None
+
   # TODO : Should the address have to be passed here and stored in meminfo
   # value: representation inside function body. Maybe stored in stack.
   #        The representation here are flexible.
@@ -445,6 +1054,78 @@ class ImplClassValueModel(ImplAggregateValueModel):
         return self.get_data_type()
 
 
+# Python proxy unwrapping for arguments into the Numba trace
+@nb_ext.unbox(ImplClassType)
+@nb_ext.unbox(ImplAggregateValueType)
+@nb_ext.unbox(ImplClassValueType)
+def unbox_instance(typ, obj, c):
+    global cppyy_as_voidptr
+
+    fnty = ir.FunctionType(ir_voidptr, [ir_voidptr])
+    fp = external_function(c.context, c.builder, fnty, CppSymbol('Instance_AsVoidPtr'), cppyy_as_voidptr)
+
+    vptr = c.context.call_function_pointer(c.builder, fp, [obj])
+    model = nb_dm.default_manager.lookup(typ)
+    pobj = c.builder.bitcast(vptr, model.get_argument_type())
+
+    return nb_ext.NativeValue(pobj, is_error=None, cleanup=None)
+
+def make_implclass(context, builder, typ, **kwargs):
+    return nb_cgu.create_struct_proxy(typ)(context, builder, **kwargs)
+
+# C++ object to Python proxy wrapping for returns from Numba trace
+@nb_ext.box(ImplClassType)
+@nb_ext.box(ImplAggregateValueType)
+@nb_ext.box(ImplClassValueType)
+def box_instance(typ, val, c):
+    assert not "requires object model and passing of intact object, not memberwise copy"
+
+    global cppyy_from_voidptr
+
+    if isinstance(val, ir.Constant):
+        if val.constant == ir.Undefined:
+            assert not "Value passed to instance boxing is undefined"
+            return NULL
+
+    implclass = make_implclass(c.context, c.builder, typ)
+    classobj = c.pyapi.unserialize(c.pyapi.serialize_object(cpp_types.Instance))
+
+    box_list = []
+
+    model = implclass._datamodel
+    cfr = CppClassFieldResolver(c.context)
+
+    for i in typ._scope.__dict__:
+        if isinstance(cfr.generic_resolve(typ, i), nb_types.Type):
+            box_list.append(c.box(cfr.generic_resolve(typ, i), getattr(implclass, i)))
+
+    box_res = c.pyapi.call_function_objargs(
+        classobj, tuple(box_list)
+    )
+    # Required for nopython mode, numba nrt requres each member box call to decref
+    # since it steals the reference
+    for i in box_list:
+        c.pyapi.decref(i)
+
+    return box_res
+
+
+# new Numba types are created while typing is in progress, so the typing context
+# needs a refresh; rather than refreshing for each type, which dominates the
+# first-compile time for traces that use many classes, refresh once on first use
+_refresh_pending = False
+
+def request_refresh():
+    global _refresh_pending
+    _refresh_pending = True
+
+def flush_refresh():
+    global _refresh_pending
+    if _refresh_pending:
+        _refresh_pending = False
+        nb_reg.cpu_target.typing_context.refresh()
+
+
 scope_numbatypes = (dict(), dict())
 
 @nb_ext.typeof_impl.register(cpp_types.Scope)
@@ -469,187 +1150,175 @@ def typeof_scope(val, c, q = Qualified.default):
         scope_numbatypes[Qualified.default][val] = cnt
         return cnt
 
-    class ImplClassType(CppClassNumbaType):
-        pass
+    if q == Qualified.default:
+        implclass = ImplClassType
+    elif q == Qualified.value:
+        if scope_info(val).is_aggregate:
+            implclass = ImplAggregateValueType
+        else:
+            implclass = ImplClassValueType
+    else:
+        assert not "unknown qualified type"
 
     if is_instance:
-        cnt = ImplClassType(cppinstance_val, Qualified.instance)
+        cnt = implclass(cppinstance_val, Qualified.instance)
     else:
-        cnt = ImplClassType(val, q)
+        cnt = implclass(val, q)
 
     scope_numbatypes[q][val] = cnt
 
-  # declare data members to Numba
-    data_members = list()
-    member_methods = dict()
-
-    for name, field in val.__dict__.items():
-        if isinstance(field, cpp_types.DataMember):
-            data_members.append(CppDataMemberInfo(
-                name, field.__cpp_reflex__(cpp_refl.OFFSET), field.__cpp_reflex__(cpp_refl.TYPE))
-            )
-        elif isinstance(field, cpp_types.Function):
-            member_methods[name] = field.__cpp_reflex__(cpp_refl.RETURN_TYPE)
-
-  # TODO: this refresh is needed b/c the scope type is registered as a
+  # TODO: the refresh is needed b/c the scope type is registered as a
   # callable after the tracing started; no idea of the side-effects ...
-    nb_reg.cpu_target.typing_context.refresh()
+    request_refresh()
 
-  # create a model description for Numba
-    if q == Qualified.default:
-        @nb_ext.register_model(ImplClassType)
-        class ImplClassModel(nb_dm.models.StructModel):
-            def __init__(self, dmm, fe_type):
-                self._data_members = data_members
-                self._member_methods = member_methods
-
-              # TODO: eventually we need not derive from StructModel
-                members = [(dmi.f_name, dmi.f_nbtype) for dmi in data_members]
-                nb_dm.models.StructModel.__init__(self, dmm, fe_type, members)
-
-          # proxies are always accessed by pointer, which are not composites
-            def traverse(self, builder):
-                return []
-
-            def traverse_models(self):
-                return []
-
-            def traverse_types(self):
-                return [self._fe_type]      # from StructModel
-
-          # data: representation used when storing into containers (e.g. arrays).
-            # TODO ...
-
-          # value: representation inside function body. Maybe stored in stack.
-          #        The representation here are flexible.
-            def get_value_type(self):
-              # the C++ object, b/c through a proxy, is always accessed by pointer; it is
-              # represented as a pointer to POD to allow indexing by Numba for data member
-              # type checking, but the address offsetting for loading data member values is
-              # independent (see get(), below), so the exact layout need not match a POD
+    return cnt
 
-              # TODO: this doesn't work for real PODs, b/c those are unpacked into their elements
-              # and passed through registers
-                return ir.PointerType(super(ImplClassModel, self).get_value_type())
+#
+# C++ instance -> Numba
+#
+@nb_ext.typeof_impl.register(cpp_types.Instance)
+def typeof_instance(val, c):
+    global scope_numbatypes
 
-          # argument: representation used for function argument. Needs to be builtin type,
-          #           but unlike other Numba composites, C++ proxies are not flattened.
-            def get_argument_type(self):
-                return self.get_value_type()
+    try:
+        return scope_numbatypes[Qualified.default][type(val)]
+    except KeyError:
+        pass
+    # Pass the val itself to obtain Cling address of the CPPInstance for reference to C++ objects
+    return typeof_scope(val, c, Qualified.instance)
 
-            def as_argument(self, builder, value):
-                return value
 
-            def from_argument(self, builder, value):
-                return value
+#
+# arrays of C++ aggregates -> Numba records
+#
+class CppRecordType(nb_types.Record):
+    """C++ aggregate stored in an array, accessed by reference like a NumPy
+    record: data members of builtin types are fields, and const methods can be
+    called, which makes it safe for use in parallel (prange) loops."""
+
+    def __init__(self, scope):
+        info = scope_info(scope)
+        fields = [(dmi.f_name, {'type' : dmi.f_nbtype, 'offset' : dmi.f_offset})
+                  for dmi in info.data_members if isinstance(dmi.f_nbtype, nb_types.Number)]
+        self._scope = scope
+        super(CppRecordType, self).__init__(fields, info.sizeof, True)
 
-          # return: representation used for return argument.
-            # TODO ...
+    def get_scope(self):
+        return self._scope
 
-          # access to public data members
-            def get(self, builder, val, pos):
-                """Get a field at the given position/field name"""
+    @property
+    def key(self):
+        return (self._scope.__cpp_name__, super(CppRecordType, self).key)
 
-                if isinstance(pos, str):
-                    pos = self.get_field_position(pos)
+    def __reduce__(self):
+        return (_rebuild_record_type, (self._scope.__cpp_name__,))
 
-                dmi = self._data_members[pos]
+def _rebuild_record_type(cppname):
+    return record_type(cppyy._resolve(cppname))
 
-                llval = builder.bitcast(val, ir_byteptr)
-                pfc = builder.gep(llval, [ir.Constant(ir_intptr_t, dmi.f_offset)])
-                pf = builder.bitcast(pfc, ir.PointerType(dmi.f_irtype))
+_record_types = dict()
 
-                return builder.load(pf)
+def record_type(scope):
+    try:
+        return _record_types[scope]
+    except KeyError:
+        pass
+    if not scope_info(scope).is_aggregate:
+        raise TypeError('%s is not an aggregate' % scope.__cpp_name__)
+    rt = _record_types[scope] = CppRecordType(scope)
+    return rt
 
-    elif q == Qualified.value:
-        if val.__cpp_reflex__(cpp_refl.IS_AGGREGATE):
-            @nb_ext.register_model(ImplClassType)
-            class ImplClassModel(ImplAggregateValueModel):
-                pass
-        else:
-            @nb_ext.register_model(ImplClassType)
-            class ImplClassModel(ImplClassValueModel):
-                pass
+nb_ext.register_model(CppRecordType)(nb_dm.models.RecordModel)
 
-        def init(self, dmm, fe_type, sz = cppyy.sizeof(val)):
-            self._data_members = data_members
-            self._member_methods = member_methods
-            self._sizeof = sz
+@nb_tmpl.infer_getattr
+class CppRecordFieldResolver(nb_tmpl.AttributeTemplate):
+    key = CppRecordType
 
-          # TODO: this code exists purely to be able to use the indexing and hierarchy
-          # of the base class StructModel, which isn't much of a reason
-            members = [(dmi.f_name, dmi.f_nbtype) for dmi in data_members]
-            nb_dm.models.StructModel.__init__(self, dmm, fe_type, members)
+    def generic_resolve(self, typ, attr):
+        if attr in typ.fields:
+            return typ.typeof(attr)
 
-        ImplClassModel.__init__ = init
+        info = scope_info(typ._scope)
+        try:
+            ft = info.const_method_types[attr]
+        except KeyError:
+          # only const methods, as the record may be shared across threads
+            ft = None
+            f = getattr(typ._scope, attr, None)
+            if isinstance(f, cpp_types.Function):
+                try:
+                    ft = CppFunctionNumbaType(f.__overload__(':any:', True), is_method=True)
+                except (LookupError, TypeError):
+                    pass
+            info.const_method_types[attr] = ft
+
+      # raise here, as the generic Record resolution fails on unknown fields
+        if ft is None:
+            raise nb_errors.TypingError('%s has no field or const method %s' % \
+                                        (typ._scope.__cpp_name__, attr))
+        return ft
 
+@nb_iutils.lower_getattr_generic(CppRecordType)
+def cpprecord_getattr_impl(context, builder, typ, val, attr):
+    if attr in typ.fields:
+        return nb_arrayobj.record_getattr(context, builder, typ, val, attr)
+
+  # assume this is a method: a record is a pointer to its data, i.e. the object
+    return builder.bitcast(val, ir_voidptr)
+
+
+class CppRecordArray(np.ndarray):
+    """NumPy array of C++ aggregates, see record_array()."""
+    __numba_array_subtype_dispatch__ = True
+
+    def __array_finalize__(self, obj):
+        cls = getattr(obj, 'cppclass', None)
+        if cls is not None and self.dtype != record_dtype(cls):
+            cls = None          # e.g. view on a field, or result of a ufunc
+        self.cppclass = cls
+        self._owner   = getattr(obj, '_owner', None)
+
+@nb_ext.typeof_impl.register(CppRecordArray)
+def typeof_record_array(val, c):
+    if val.cppclass is None:
+        return nb_ext.typeof_impl.dispatch(np.ndarray)(val, c)
+    return nb_types.Array(record_type(val.cppclass), val.ndim,
+                          nb_npsupport.map_layout(val), readonly=not val.flags.writeable)
+
+def record_dtype(cls):
+    """NumPy structured dtype with the layout of C++ aggregate <cls>, with a
+    field for each data member of builtin type."""
+    return record_type(cls).dtype
+
+def record_array(data, cls=None):
+    """Returns a NumPy view on an array of C++ aggregates of type <cls> for
+    use in JITed code, where its elements have the data members and const
+    methods of <cls>, also in prange loops. <data> is either a container with
+    contiguous storage exposed through data(), such as std::vector, which the
+    view keeps alive and from which <cls> is taken if not given, or a NumPy
+    array with items of the size of <cls>.
+    """
+    if isinstance(data, np.ndarray):
+        if cls is None:
+            raise TypeError('the C++ class of the elements is required for NumPy arrays')
+        dtype = record_dtype(cls)
+        if data.dtype.itemsize != dtype.itemsize:
+            raise TypeError('array items of size %d do not match %s (size %d)' % \
+                            (data.dtype.itemsize, cls.__cpp_name__, dtype.itemsize))
+        view, owner = data.view(dtype), None
     else:
-        assert not "unknown qualified type"
-
-  # Python proxy unwrapping for arguments into the Numba trace
-    @nb_ext.unbox(ImplClassType)
-    def unbox_instance(typ, obj, c):
-        global cppyy_as_voidptr
-
-        ptrty = ir.PointerType(ir.FunctionType(ir_voidptr, [ir_voidptr]))
-        ptrval = c.context.add_dynamic_addr(c.builder, cppyy_as_voidptr, info='Instance_AsVoidPtr')
-        fp = c.builder.bitcast(ptrval, ptrty)
-
-        vptr = c.context.call_function_pointer(c.builder, fp, [obj])
-        model = nb_dm.default_manager.lookup(typ)
-        pobj = c.builder.bitcast(vptr, model.get_argument_type())
-
-        return nb_ext.NativeValue(pobj, is_error=None, cleanup=None)
-
-    def make_implclass(context, builder, typ, **kwargs):
-        return nb_cgu.create_struct_proxy(typ)(context, builder, **kwargs)
-
-  # C++ object to Python proxy wrapping for returns from Numba trace
-    @nb_ext.box(ImplClassType)
-    def box_instance(typ, val, c):
-        assert not "requires object model and passing of intact object, not memberwise copy"
-
-        global cppyy_from_voidptr
-
-        if isinstance(val, ir.Constant):
-            if val.constant == ir.Undefined:
-                assert not "Value passed to instance boxing is undefined"
-                return NULL
-
-        implclass = make_implclass(c.context, c.builder, typ)
-        classobj = c.pyapi.unserialize(c.pyapi.serialize_object(cpp_types.Instance))
-
-        box_list = []
-
-        model = implclass._datamodel
-        cfr = CppClassFieldResolver(c.context)
-
-        for i in typ._scope.__dict__:
-            if isinstance(cfr.generic_resolve(typ, i), nb_types.Type):
-                box_list.append(c.box(cfr.generic_resolve(typ, i), getattr(implclass, i)))
-
-        box_res = c.pyapi.call_function_objargs(
-            classobj, tuple(box_list)
-        )
-        # Required for nopython mode, numba nrt requres each member box call to decref
-        # since it steals the reference
-        for i in box_list:
-            c.pyapi.decref(i)
-
-        return box_res
-
-    return cnt
-
-#
-# C++ instance -> Numba
-#
-@nb_ext.typeof_impl.register(cpp_types.Instance)
-def typeof_instance(val, c):
-    global scope_numbatypes
+        ptr = data.data()
+        if cls is None:
+            cls = type(ptr)
+        dtype = record_dtype(cls)
+        if len(data):
+            buf = (ctypes.c_char * (len(data)*dtype.itemsize)).from_address(cppyy.addressof(ptr))
+            view = np.frombuffer(buf, dtype=dtype)
+        else:
+            view = np.empty(0, dtype=dtype)
+        owner = data
 
-    try:
-        return scope_numbatypes[Qualified.default][type(val)]
-    except KeyError:
-        pass
-    # Pass the val itself to obtain Cling address of the CPPInstance for reference to C++ objects
-    return typeof_scope(val, c, Qualified.instance)
+    view = view.view(CppRecordArray)
+    view.cppclass = cls
+    view._owner   = owner
+    return view
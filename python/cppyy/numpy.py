@@ -0,0 +1,231 @@
+""" cppyy extensions for NumPy: zero-copy conversions between std::vector and
+numpy.ndarray, based on the buffer protocol of LowLevelView, and elementwise
+application of C++ functions over arrays
+"""
+
+import cppyy
+
+from ._trampoline import _call_expression, _cpp_types, _CallShim
+
+import numpy as np
+
+__all__ = [
+    'asarray',
+    'to_vector',
+    'vectorize',
+    ]
+
+
+class _VectorOwner(object):
+    """Exposes the data of a C++ container through the array interface and
+    keeps the container alive for as long as views on it exist."""
+
+    def __init__(self, vec, view):
+        self.vector = vec
+        self.__array_interface__ = view.__array_interface__
+
+
+def _empty(vec):
+  # data() of an empty container may be a nullptr, so take the dtype from the
+  # element type instead of from a view
+    cpptype = cppyy._split_template_args(type(vec).__cpp_name__)[:1]
+    for char, name in _cpp_types.items():
+        if [name] == cpptype:
+            return np.empty(0, dtype=char)
+    raise TypeError('no NumPy dtype for the elements of %s' % type(vec).__cpp_name__)
+
+def _view(vec):
+    if not len(vec):
+        return _empty(vec)
+    view = np.asarray(memoryview(vec.data()))
+    if len(view) != len(vec):       # size of the view is unchecked if unknown
+        view = view[:len(vec)]
+    return view
+
+def asarray(vec, copy=False):
+    """Returns a numpy.ndarray of the elements of <vec>, which can be any C++
+    container with contiguous storage exposed through data() (e.g. std::vector
+    or std::array); unless <copy> is set, the array is a view on the data of
+    <vec> and keeps <vec> alive.
+    """
+    view = _view(vec)
+    if copy or not len(vec):
+        return view.copy()
+    return np.asarray(_VectorOwner(vec, view))
+
+
+def _owning_vector(arr):
+    owner = arr.base
+    if not isinstance(owner, _VectorOwner):
+        return None
+    vec = owner.vector
+    if arr.shape != (len(vec),) or not arr.flags.c_contiguous or \
+            arr.__array_interface__['data'][0] != _view(vec).__array_interface__['data'][0]:
+        return None                 # a slice or a reshape of the original
+    return vec
+
+
+def to_vector(arr, move=True):
+    """Returns a std::vector with the elements of the flattened <arr>; if <move>
+    and <arr> is a full view on a vector (see asarray), that vector itself is
+    returned, otherwise the data of <arr> is copied in a single memory copy.
+    """
+    arr = np.asarray(arr)
+    try:
+        if arr.dtype.char == '?':   # std::vector<bool> has no contiguous storage
+            raise KeyError(arr.dtype.char)
+        vector = cppyy.gbl.std.vector[_cpp_types[arr.dtype.char]]
+    except KeyError:
+        raise TypeError('no C++ std::vector equivalent for dtype %s' % arr.dtype)
+
+    if move:
+        vec = _owning_vector(arr)
+        if isinstance(vec, vector):
+            return vec
+
+  # the vector can not adopt the memory of the array, as its data is always
+  # allocated through the vector's allocator, so copy into its data instead
+    vec = vector()
+    if arr.size:
+        vec.resize(arr.size)
+        np.copyto(_view(vec), arr.reshape(-1))
+    return vec
+
+
+#- elementwise application of C++ functions -----------------------------------
+_loop_helpers_declared = False
+def _declare_loop_helpers():
+    global _loop_helpers_declared
+    if _loop_helpers_declared:
+        return
+    cppyy._cppdef("""namespace __cppyy_internal {
+template<typename O, typename F, typename... T, size_t... I>
+void vectorized_loop_impl(F f, int nd, const intptr_t* shape, char* out, const intptr_t* ostr,
+        char* const* in, const intptr_t* istr, std::index_sequence<I...>) {
+    for (int d = 0; d < nd; ++d)
+        if (shape[d] == 0) return;
+    if (nd == 0) {
+        *(O*)out = (O)f(*(T*)in[I]...);
+        return;
+    }
+    const intptr_t inner = shape[nd-1], ostep = ostr[nd-1];
+    std::vector<intptr_t> idx(nd, 0);
+    while (true) {
+        char* o = out;
+        char* p[sizeof...(T)+1] = {in[I]..., nullptr};
+        for (int d = 0; d < nd-1; ++d) {
+            o += idx[d]*ostr[d];
+            for (size_t k = 0; k < sizeof...(T); ++k) p[k] += idx[d]*istr[k*nd+d];
+        }
+        for (intptr_t i = 0; i < inner; ++i)
+            *(O*)(o+i*ostep) = (O)f(*(T*)(p[I]+i*istr[I*nd+nd-1])...);
+        int d = nd-2;
+        for (; 0 <= d; --d) {
+            if (++idx[d] < shape[d]) break;
+            idx[d] = 0;
+        }
+        if (d < 0) break;
+    }
+}
+
+template<typename O, typename... T, typename F>
+void vectorized_loop(F f, int nd, intptr_t shape, intptr_t out, intptr_t ostr, intptr_t in, intptr_t istr) {
+    vectorized_loop_impl<O, F, T...>(f, nd, (const intptr_t*)shape, (char*)out,
+        (const intptr_t*)ostr, (char* const*)in, (const intptr_t*)istr, std::index_sequence_for<T...>{});
+} }""")
+    _loop_helpers_declared = True
+
+class _Loops(object):
+    """JITed loops for one combination of input element types."""
+
+    def __init__(self, call, intypes):
+        self._shim = _CallShim('vectorized', call, intypes,
+            'char rettype() { return typecode<enum_underlying<std::decay<R>::type>::type>(); }')
+        self._loops = dict()
+        self.rettype = self._shim.ns.rettype()
+
+    def loop(self, outtype):
+        try:
+            return self._loops[outtype]
+        except KeyError:
+            pass
+        shim = self._shim
+        lname = 'loop_%s' % len(self._loops)
+        shim.declare("""\
+void %(lname)s(intptr_t self, int nd, intptr_t shape, intptr_t out, intptr_t ostr, intptr_t in, intptr_t istr) {
+    auto f = [self](%(params)s) { return call(self%(sep)s%(args)s); };
+    vectorized_loop<%(targs)s>(f, nd, shape, out, ostr, in, istr);
+}""" % {'lname' : lname, 'params' : shim.params, 'args' : shim.args, 'sep' : shim.sep,
+        'targs' : ', '.join((outtype,)+shim.cpptypes)})
+        loop = self._loops[outtype] = getattr(shim.ns, lname)
+        return loop
+
+
+class vectorize(object):
+    """Wraps C++ function (or bound method) <func> into a callable that applies
+    it elementwise to NumPy arrays (or anything convertible), with broadcasting
+    of the arguments and optional <out> argument, like a NumPy ufunc.
+
+    The overload is selected by the C++ compiler, once for each combination of
+    argument dtypes, and the loop over the elements runs entirely in C++.
+    """
+
+    def __init__(self, func):
+        self._func = func
+        self.__name__ = func.__name__
+        self.__doc__  = func.__doc__
+
+        self._self, self._call = _call_expression(func)
+        self._loops = dict()
+
+    def _get_loops(self, dtypes):
+        key = tuple(dt.char for dt in dtypes)
+        try:
+            return self._loops[key]
+        except KeyError:
+            pass
+        _declare_loop_helpers()
+        try:
+            loops = _Loops(self._call, tuple(_cpp_types[c] for c in key))
+        except (KeyError, SyntaxError):
+            raise TypeError('%s does not support argument dtypes (%s)' % \
+                            (self.__name__, ', '.join(dt.name for dt in dtypes)))
+        self._loops[key] = loops
+        return loops
+
+    def __call__(self, *args, out=None):
+        ins = list()
+        for arg in args:
+            arr = np.asarray(arg)
+            if not arr.dtype.isnative:
+                arr = arr.astype(arr.dtype.newbyteorder('='))
+            ins.append(arr)
+        loops = self._get_loops([arr.dtype for arr in ins])
+
+        shape = np.broadcast(*(ins+(out is not None and [out] or []))).shape \
+                if ins or out is not None else ()
+        if out is None:
+            if loops.rettype not in _cpp_types:
+                raise TypeError('%s returns a type that has no NumPy equivalent' % self.__name__)
+            result = np.empty(shape, dtype=loops.rettype)
+        else:
+            if not isinstance(out, np.ndarray) or out.shape != shape:
+                raise ValueError('out must be an array of the broadcast shape %s' % (shape,))
+            if not out.dtype.isnative or out.dtype.char not in _cpp_types:
+                raise TypeError('out has unsupported dtype %s' % out.dtype)
+            result = out
+
+        ins = [np.broadcast_to(arr, shape) for arr in ins]
+        nd = len(shape)
+        shape_a = np.array(shape or (0,), dtype=np.intp)
+        ostr_a  = np.array(result.strides or (0,), dtype=np.intp)
+        in_a    = np.array([arr.ctypes.data for arr in ins] or [0], dtype=np.intp)
+        istr_a  = np.array([s for arr in ins for s in arr.strides] or [0], dtype=np.intp)
+
+        this = self._self is not None and cppyy.addressof(self._self) or 0
+        loops.loop(_cpp_types[result.dtype.char])(this, nd, shape_a.ctypes.data,
+            result.ctypes.data, ostr_a.ctypes.data, in_a.ctypes.data, istr_a.ctypes.data)
+
+        if out is None and not nd:
+            return result[()]
+        return result
@@ -14,7 +14,7 @@ except ImportError:
        'RETURN_TYPE',
     ]
 
-    cppyy.include("CPyCppyy/Reflex.h")
+    cppyy._include("CPyCppyy/Reflex.h")
 
     IS_NAMESPACE   = cppyy.gbl.Cppyy.Reflex.IS_NAMESPACE
     IS_AGGREGATE   = cppyy.gbl.Cppyy.Reflex.IS_AGGREGATE
@@ -2,6 +2,7 @@
 """
 
 import cppyy
+from ._dispatch import DispatchCache
 
 bck = cppyy._backend
 Instance      = bck.CPPInstance
@@ -9,12 +10,14 @@ Instance      = bck.CPPInstance
 try:
     import __pypy__
     __all__ = [
+        'DispatchCache',
         'Instance'
     ]
 
 except ImportError:
     __all__ = [
         'DataMember',
+        'DispatchCache',
         'Instance',
         'Function',
         'Method',
@@ -1,3 +1,4 @@
+import os
 from pytest import raises, skip
 from .support import ispypy
 
@@ -222,3 +223,99 @@ class TestAPI:
         assert     Sequence_Check(cppyy.gbl.std.vector[ns.MyClass]())
         assert not Sequence_Check(cppyy.gbl.std.list[ns.MyClass]())
 
+
+    def test07_compiled_call(self):
+        """JITed trampolines for a fixed signature"""
+
+        import cppyy
+
+        cppyy.cppdef("""
+        namespace CompiledCall {
+        struct Point { double fX, fY; };
+        double add(double a, int b) { return a+b; }
+        int    add(int a, int b) { return a+b; }
+        void   empty() {}
+        std::string greet(const std::string& s) { return "Hello, " + s; }
+        Point make_point(double x, double y) { return Point{x, y}; }
+        double norm2(const Point& p) { return p.fX*p.fX+p.fY*p.fY; }
+        struct Counter {
+            int fCount = 0;
+            int incr(int by) { fCount += by; return fCount; }
+            static int twice(int i) { return 2*i; }
+        };
+        int thrower(int i) {
+            if (i < 0) throw std::runtime_error("negative");
+            if (i > 9) throw std::out_of_range("too large");
+            return i;
+        }
+        }""")
+
+        ns = cppyy.gbl.CompiledCall
+
+        add = cppyy.compile_call(ns.add, 'double, int')
+        assert add(1.5, 2) == 3.5
+        add = cppyy.compile_call(ns.add, 'int, int')
+        assert add(1, 2) == 3
+        with raises(TypeError):
+            add(1., 2)                  # no implicit conversions
+        with raises(TypeError):
+            add(1)
+        with raises(OverflowError):
+            add(2**40, 1)
+
+        assert cppyy.compile_call(ns.empty, '')() is None
+        assert cppyy.compile_call(ns.greet, 'const std::string&')("World") == "Hello, World"
+
+        p = cppyy.compile_call(ns.make_point, 'double, double')(3., 4.)
+        assert type(p) == ns.Point
+        assert cppyy.compile_call(ns.norm2, 'const CompiledCall::Point&', release_gil=True)(p) == 25.
+        with raises(TypeError):
+            cppyy.compile_call(ns.norm2, 'const CompiledCall::Point&')(ns.Counter())
+
+        c = ns.Counter()
+        incr = cppyy.compile_call(ns.Counter.incr, 'int')
+        assert incr(c, 3) == 3
+        assert incr(c, 4) == 7
+        assert c.fCount == 7
+        assert cppyy.compile_call(ns.Counter.twice, 'int')(21) == 42
+
+        thrower = cppyy.compile_call(ns.thrower, 'int')
+        assert thrower(1) == 1
+        with raises(cppyy.gbl.std.runtime_error):
+            thrower(-1)
+        with raises(cppyy.gbl.std.out_of_range):
+            thrower(10)
+        assert thrower(2) == 2
+
+        thrower = cppyy.compile_call(ns.thrower, 'int', release_gil=True)
+        with raises(cppyy.gbl.std.out_of_range) as exc:
+            thrower(10)
+        assert 'too large' in str(exc.value)
+
+    def test08_api_path_cache(self):
+        """Cached location of the CPyCppyy API headers"""
+
+        import cppyy, shutil, tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            apidir = os.path.join(tmpdir, 'include')
+            os.makedirs(os.path.join(apidir, 'CPyCppyy'))
+            cache = (os.path.join(tmpdir, 'CPyCppyy_API.path'), 'key')
+
+          # hit
+            cppyy._write_api_cache(cache, apidir)
+            assert cppyy._read_api_cache(cache) == apidir
+
+          # stale key, or stale location
+            assert cppyy._read_api_cache((cache[0], 'otherkey')) is None
+            os.rmdir(os.path.join(apidir, 'CPyCppyy'))
+            assert cppyy._read_api_cache(cache) is None
+
+          # unwritable directory: nothing is written and nothing is raised
+            nodir = (os.path.join(tmpdir, 'doesnotexist', 'CPyCppyy_API.path'), 'key')
+            cppyy._write_api_cache(nodir, apidir)
+            assert not os.path.exists(nodir[0])
+            assert cppyy._read_api_cache(nodir) is None
+        finally:
+            shutil.rmtree(tmpdir)
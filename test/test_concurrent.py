@@ -299,3 +299,234 @@ class TestCONCURRENT:
 
         assert State.c1 == 1000
         assert State.c2 == State.c3
+
+    def test08_sizeof_typeid_in_threads(self):
+        """Concurrent sizeof/typeid misses resolve once and agree"""
+
+        import cppyy
+        import threading
+
+        cppyy.cppdef("""\
+        namespace CPPTypeInfoCache {
+        struct Record { int a; double b; char c[13]; };
+        }""")
+
+        Record = cppyy.gbl.CPPTypeInfoCache.Record
+
+        results = list()
+        def test():
+            results.append((cppyy.sizeof(Record), cppyy.sizeof('CPPTypeInfoCache::Record'),
+                            cppyy.typeid(Record).name()))
+
+        threads = [threading.Thread(target=test) for i in range(0, 50)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        assert len(results) == 50
+        assert len(set(results)) == 1
+        assert results[0][0] == results[0][1]
+        assert 'Record' in results[0][2]
+
+        cppyy.set_type_cache_size(1)
+        assert cppyy.sizeof('int') == 4
+        assert cppyy.sizeof(Record) == results[0][0]
+        cppyy.set_type_cache_size(None)
+
+    def test09_auto_gil_policy(self):
+        """Release the GIL based on timings of the first calls"""
+
+        import cppyy, sys
+
+        if not hasattr(sys, 'monitoring'):
+            raises(NotImplementedError, cppyy.py.set_gil_policy, 'Worker', 'work', 'auto')
+            skip('timing of calls requires sys.monitoring')
+
+        cppyy.cppdef("""\
+        #include <chrono>
+        #include <thread>
+
+        namespace CPPAutoGIL {
+        int fast(int i) { return i; }
+        int slow(int i) {
+            std::this_thread::sleep_for(std::chrono::milliseconds(5));
+            return i;
+        }
+        int rare(int i) { return i; }
+        struct Worker {
+            int work(int i) {
+                std::this_thread::sleep_for(std::chrono::milliseconds(5));
+                return i;
+            }
+        }; }""")
+
+        ns = cppyy.gbl.CPPAutoGIL
+        fast, slow, rare = ns.fast, ns.slow, ns.rare
+
+        cppyy.py.probe_gil_policy(ns, 'fast', threshold=1E-3, samples=4)
+        cppyy.py.probe_gil_policy(ns, 'slow', threshold=1E-3, samples=4)
+        cppyy.py.probe_gil_policy(ns, 'rare', threshold=0., samples=100)
+
+      # probed functions stay in place, with all their properties
+        assert ns.__dict__['slow'] is slow
+        assert ns.slow.__doc__ == 'int CPPAutoGIL::slow(int i)'
+        fast.__sig2exc__ = True
+
+        for i in range(4):
+            assert ns.fast(i) == i
+            assert ns.slow(i) == i
+            assert ns.rare(i) == i
+
+        assert ns.__dict__['fast'] is fast
+        assert ns.__dict__['slow'] is slow
+        assert not fast.__release_gil__
+        assert fast.__sig2exc__
+        assert slow.__release_gil__
+        assert not rare.__release_gil__        # undecided
+
+        decisions = {d['name'] : d for d in cppyy.py.gil_policy_decisions()}
+        assert decisions['CPPAutoGIL::slow']['release_gil']
+        assert decisions['CPPAutoGIL::slow']['samples'] == 4
+        assert 5E-3 <= decisions['CPPAutoGIL::slow']['median']
+        assert not decisions['CPPAutoGIL::fast']['release_gil']
+        assert not 'CPPAutoGIL::rare' in decisions
+
+      # through a pythonizor for classes bound after installation
+        cppyy.py.add_pythonization(
+            cppyy.py.set_gil_policy('Worker', 'work', 'auto', threshold=1E-3, samples=2), 'CPPAutoGIL')
+
+        w = ns.Worker()
+        assert w.work(1) == 1
+        assert w.work(2) == 2
+        assert ns.Worker.work.__release_gil__
+        assert 'CPPAutoGIL::Worker::work' in [d['name'] for d in cppyy.py.gil_policy_decisions()]
+
+    def test10_parallel_map(self):
+        """Call C++ functions over many arguments on native threads"""
+
+        import cppyy
+        import array
+
+        cppyy.cppdef("""\
+        #include <stdexcept>
+
+        namespace CPPParallelMap {
+        double square(double d) { return d*d; }
+        int add(int i, int j) { return i+j; }
+        bool is_even(long long l) { return l % 2 == 0; }
+        size_t length(const std::string& s) { return s.size(); }
+        int check(int i) {
+            if (i == 5) throw std::domain_error("five");
+            return i;
+        }
+        struct Point {
+            Point(int x) : fX(x) {}
+            int fX;
+        };
+        Point make(int i) { return Point(i); }
+        int getx(const Point& p) { return p.fX; }
+        struct Scaler {
+            int fScale;
+            int scale(int i) const { return fScale*i; }
+        }; }""")
+
+        ns = cppyy.gbl.CPPParallelMap
+
+        N = 1000
+        assert cppyy.parallel_map(ns.square, range(N)) == [float(i*i) for i in range(N)]
+        assert cppyy.parallel_map(ns.add, range(N), range(N), workers=3) == [2*i for i in range(N)]
+        assert cppyy.parallel_map(ns.is_even, [2**40, 3]) == [True, False]
+        assert cppyy.parallel_map(ns.length, ['aap', 'noot', 'mies']) == [3, 4, 4]
+        assert cppyy.parallel_map(ns.square, []) == []
+
+      # buffers are used in place, results can be stored in a buffer
+        a = array.array('d', range(N))
+        out = array.array('d', [0.]*N)
+        assert cppyy.parallel_map(ns.square, a, out=out) is out
+        assert list(out) == [float(i*i) for i in range(N)]
+
+        with raises(ValueError):
+            cppyy.parallel_map(ns.add, range(3), range(4))
+
+      # instances of C++ classes, in and out
+        points = cppyy.parallel_map(ns.make, range(10))
+        assert [p.fX for p in points] == list(range(10))
+        assert points[0].__python_owns__
+        assert cppyy.parallel_map(ns.getx, points, workers=2) == list(range(10))
+
+      # bound methods
+        s = ns.Scaler(); s.fScale = 3
+        assert cppyy.parallel_map(s.scale, range(10)) == [3*i for i in range(10)]
+
+      # C++ exceptions propagate
+        with raises(cppyy.gbl.std.domain_error):
+            cppyy.parallel_map(ns.check, range(N))
+
+    def test11_asyncio_calls(self):
+        """Await C++ calls that run off the event loop"""
+
+        import cppyy, cppyy.aio
+        import asyncio, time
+
+        cppyy.cppdef("""\
+        #include <chrono>
+        #include <stdexcept>
+        #include <thread>
+
+        namespace CPPAsync {
+        int slow(int i) {
+            std::this_thread::sleep_for(std::chrono::milliseconds(200));
+            return i;
+        }
+        int fail(int) { throw std::domain_error("failed"); }
+        struct Adder {
+            int fBase;
+            int add(int i) const { return fBase+i; }
+        }; }""")
+
+        ns = cppyy.gbl.CPPAsync
+
+        async def ticker(ticks):
+            while True:
+                await asyncio.sleep(0.01)
+                ticks.append(1)
+
+        async def main():
+            ticks = list()
+            task = asyncio.ensure_future(ticker(ticks))
+            start = time.perf_counter()
+            results = await asyncio.gather(cppyy.aio.call(ns.slow, 1), cppyy.aio.async_(ns.slow)(2))
+            elapsed = time.perf_counter() - start
+            task.cancel()
+            return results, elapsed, len(ticks)
+
+        results, elapsed, nticks = asyncio.run(main())
+        assert results == [1, 2]
+        assert elapsed < 0.39          # ran in parallel
+        assert 5 < nticks              # event loop was not blocked
+
+      # the original function is unchanged; its GIL-releasing copy is made once
+        assert not ns.slow.__release_gil__
+        assert cppyy.aio._without_gil(ns.slow) is cppyy.aio._without_gil(ns.slow)
+
+      # exceptions are translated as for direct calls
+        async def failing():
+            return await cppyy.aio.call(ns.fail, 1)
+
+        with raises(cppyy.gbl.std.domain_error):
+            asyncio.run(failing())
+
+      # bound methods
+        a = ns.Adder(); a.fBase = 40
+
+        async def bound():
+            return await cppyy.aio.async_(a.add)(2)
+
+        assert asyncio.run(bound()) == 42
+        assert not a.add.__release_gil__
+
+        b = ns.Adder(); b.fBase = 10
+        assert asyncio.run(cppyy.aio.call(b.add, 2)) == 12
@@ -6,6 +6,17 @@ from .support import setup_make, ispypy, IS_WINDOWS, IS_MAC_ARM
 currpath = py.path.local(__file__).dirpath()
 test_dct = str(currpath.join("fragileDict"))
 
+def wait_for_cache(cache_dir, timeout=600):
+    """Wait for the background builds of cached dictionaries in <cache_dir>;
+    returns whether any dictionary was built."""
+    import time
+    for i in range(timeout):
+        files = os.listdir(cache_dir)
+        if [f for f in files if f.endswith('Dict.so') or f.endswith('.failed')]:
+            break
+        time.sleep(1)
+    return bool([f for f in files if f.endswith('Dict.so')])
+
 def setup_module(mod):
     setup_make("fragile")
 
@@ -715,6 +726,199 @@ class TestFRAGILE:
                         (cppyy.gbl.ClassEnumNS, 37)]:
             assert ns.EnumTemplate[ns.ClassEnumA.A]().foo() == val
 
+    def test32_persistent_cppdef_cache(self):
+        """Reuse of cppdef results across processes"""
+
+        if ispypy or IS_WINDOWS:
+            skip('dictionary generation not supported on this platform')
+
+        import cppyy, subprocess, tempfile
+
+      # std::string is available in Cling without including <string>
+        code = "namespace cached_cppdef { int get42() { return std::string(42, 'x').size(); } }"
+        cache_dir = tempfile.mkdtemp()
+
+        cppyy.set_cache_dir(cache_dir)
+        try:
+            stats = cppyy.cache_stats()
+            assert stats['cache_dir'] == cache_dir
+            cppyy.cppdef(code)
+            assert cppyy.cache_stats()['misses'] == stats['misses'] + 1
+            assert cppyy.gbl.cached_cppdef.get42() == 42
+        finally:
+            cppyy.set_cache_dir(None)
+        assert cppyy.cache_stats()['cache_dir'] is None
+
+      # a fresh process with the same inputs loads the dictionary instead
+        cache_dir = tempfile.mkdtemp()
+        def run():
+            return subprocess.check_output([sys.executable, '-c', """import cppyy
+cppyy.cppdef(%r)
+stats = cppyy.cache_stats()
+print(cppyy.gbl.cached_cppdef.get42(), stats['hits'], stats['stores'])""" % code],
+                env=dict(os.environ, CPPYY_CACHE_DIR=cache_dir)).split()
+
+        assert run() == [b'42', b'0', b'1']     # build started in the background
+        if not wait_for_cache(cache_dir):
+            skip('could not build cached dictionary (missing compiler?)')
+        assert run() == [b'42', b'1', b'0']
+
+      # included headers are keyed on the content of all their dependencies
+        from cppyy import _cppcache
+
+        incdir = tempfile.mkdtemp()
+        for name, text in [('top.h', '#include "dep.h"\n'), ('dep.h', 'int dep();\n')]:
+            with open(os.path.join(incdir, name), 'w') as f:
+                f.write(text)
+        top = os.path.join(incdir, 'top.h')
+        deps = _cppcache._dependencies(top)
+        if deps is None:
+            skip('no compiler to list dependencies')
+        assert _cppcache._dependencies(top) == deps
+        with open(os.path.join(incdir, 'dep.h'), 'w') as f:
+            f.write('int dep(int);\n')
+        assert _cppcache._dependencies(top) != deps
+
+    def test33_cppdef_many(self):
+        """Declare multiple sources in one transaction"""
+
+        import cppyy
+
+        assert cppyy.cppdef_many(
+            ["namespace cppdef_many { int f1() { return 1; } }",
+             "namespace cppdef_many {\n  int f2() { return f1()+1; }\n}",
+             "namespace cppdef_many { int f3() { return f2()+1; } }"])
+
+        ns = cppyy.gbl.cppdef_many
+        assert ns.f1() == 1
+        assert ns.f2() == 2
+        assert ns.f3() == 3
+
+        with raises(SyntaxError) as cppdef_exc:
+            cppyy.cppdef_many(
+                ["namespace cppdef_many { int g1() { return 1; } }",
+                 "namespace cppdef_many {\n  int g2() { return 1aap; }\n}"])
+        assert "(source 1, line 2)" in str(cppdef_exc.value)
+
+    def test34_startup_profile(self):
+        """Per-phase timings of cppyy's import"""
+
+        import cppyy, subprocess
+
+      # profiling is off by default (the envar may be set, however)
+        if not os.getenv('CPPYY_PROFILE_STARTUP'):
+            assert cppyy.startup_profile() == []
+
+        out = subprocess.check_output([sys.executable, '-c', """import cppyy
+for phase, elapsed, drss, rss in cppyy.startup_profile():
+    assert 0. <= elapsed and 0 <= rss
+    print(phase)"""], env=dict(os.environ, CPPYY_PROFILE_STARTUP='1'))
+        phases = out.decode().split()
+        for phase in ['pch', 'autoloading', 'typemap', 'include_paths']:
+            assert phase in phases
+        if not ispypy:
+            assert 'load_cpp_backend' in phases
+        assert phases.index('pch') < phases.index('include_paths')
+
+    def test35_prewarm(self):
+        """Resolve C++ entities ahead of use"""
+
+        import cppyy
+
+        cppyy.cppdef("""\
+        namespace prewarm {
+        struct Outer { struct Inner {}; };
+        template<typename T> struct Templ {};
+        int func() { return 42; }
+        }""")
+
+        names = ['prewarm::Outer::Inner', 'prewarm::Templ<int>', 'prewarm::func',
+                 'std::vector<std::vector<int> >', 'prewarm::doesnotexist']
+
+        for background in (False, True):
+            future = cppyy.prewarm(names, background=background)
+            res = future.result(timeout=60)
+
+            assert res['prewarm::Outer::Inner'] is cppyy.gbl.prewarm.Outer.Inner
+            assert res['prewarm::Templ<int>'] is cppyy.gbl.prewarm.Templ[int]
+            assert res['prewarm::func']() == 42
+            assert res['std::vector<std::vector<int> >'] is \
+                cppyy.gbl.std.vector[cppyy.gbl.std.vector[int]]
+            assert isinstance(res['prewarm::doesnotexist'], AttributeError)
+
+    def test36_bulk_macros(self):
+        """Evaluate many C++ pre-processor macro's in one go"""
+
+        import cppyy, tempfile
+
+        cppyy.cppdef("""\
+        #define BULK_INT 42
+        #define BULK_DOUBLE 3.5
+        #define BULK_STR "bulk"
+        #define BULK_FUNC(x) (x)
+        #define BULK_BROKEN +""")
+
+        res = cppyy.macros(['BULK_INT', 'BULK_DOUBLE', 'BULK_STR', 'BULK_FUNC', 'BULK_BROKEN', 'BULK_UNDEF'])
+        assert res == {'BULK_INT' : 42, 'BULK_DOUBLE' : 3.5, 'BULK_STR' : 'bulk'}
+
+      # cached values are dropped on new declarations
+        assert cppyy.macros(['BULK_UNDEF']) == {}
+        cppyy.cppdef('#define BULK_UNDEF 17')
+        assert cppyy.macro('BULK_UNDEF') == 17
+
+        fd, hdr = tempfile.mkstemp(suffix='.h')
+        with os.fdopen(fd, 'w') as f:
+            f.write("""\
+        #ifndef BULK_HEADER_H
+        #define BULK_HEADER_H
+        #define BULK_FLAG_A 0x1
+        #define BULK_FLAG_B (BULK_FLAG_A << 1)
+        #define BULK_OTHER 3
+        #endif""")
+
+      # headers need not be valid in the locale encoding
+        fd, hdr_latin1 = tempfile.mkstemp(suffix='.h')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'// d\xe9j\xe0 vu (Latin-1)\n#define BULK_LATIN1 7\n')
+
+        try:
+            assert cppyy.import_macros(hdr, 'BULK_FLAG_') == {'BULK_FLAG_A' : 1, 'BULK_FLAG_B' : 2}
+            assert cppyy.import_macros(hdr)['BULK_OTHER'] == 3
+            assert cppyy.import_macros(hdr_latin1) == {'BULK_LATIN1' : 7}
+        finally:
+            os.remove(hdr)
+            os.remove(hdr_latin1)
+
+    def test37_persistent_cache_non_classes(self):
+        """Free functions, templates, and macro's from the persistent cache"""
+
+        if ispypy or IS_WINDOWS:
+            skip('dictionary generation not supported on this platform')
+
+        import subprocess, tempfile
+
+        code = """\
+        #define CACHED_MACRO 17
+        int cached_free() { return 42; }
+        template<typename T> T cached_templ(T t) { return t+1; }
+        namespace cached_using { int used() { return 3; } }
+        using cached_using::used;"""
+
+      # internal helpers (here: cppyy.ll) must work the same with or without hits
+        cache_dir = tempfile.mkdtemp()
+        def run():
+            return subprocess.check_output([sys.executable, '-c', """import cppyy, cppyy.ll
+cppyy.cppdef(%r)
+res = [cppyy.gbl.cached_free(), cppyy.gbl.cached_templ[int](41), cppyy.macro('CACHED_MACRO'),
+       cppyy.gbl.used(), int(cppyy.ll.cast['long'](3.5))]
+print(' '.join(map(str, res)), cppyy.cache_stats()['hits'])""" % code],
+                env=dict(os.environ, CPPYY_CACHE_DIR=cache_dir)).split()
+
+        assert run() == [b'42', b'42', b'17', b'3', b'3', b'0']
+        if not wait_for_cache(cache_dir):
+            skip('could not build cached dictionary (missing compiler?)')
+        assert run() == [b'42', b'42', b'17', b'3', b'3', b'1']
+
 
 class TestSIGNALS:
     def setup_class(cls):
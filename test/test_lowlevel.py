@@ -519,6 +519,112 @@ class TestLOWLEVEL:
         g = cppyy.gbl
         assert g.test15_templated_arrays_gmpxx.vector.value_type[g.std.vector[g.mpz_class]]
 
+    def test16_numpy_vector_bridge(self):
+        """Zero-copy conversions between std::vector and numpy arrays"""
+
+        import cppyy
+
+        try:
+            import numpy as np
+        except ImportError:
+            skip('numpy is not installed')
+
+        import cppyy.numpy as cnp
+
+        v = cppyy.gbl.std.vector['float'](range(10))
+        a = cnp.asarray(v)
+        assert a.dtype == np.float32
+        assert list(a) == list(range(10))
+
+        a[0] = 42
+        assert v[0] == 42               # view on the vector's data
+        b = cnp.asarray(v, copy=True)
+        b[1] = 13
+        assert v[1] == 1
+
+        del v
+        import gc
+        gc.collect()
+        assert a[0] == 42               # vector kept alive by the view
+
+        assert cnp.to_vector(a) is a.base.vector
+        assert cnp.to_vector(a, move=False) is not a.base.vector
+        assert cnp.to_vector(a[2:]) is not a.base.vector
+
+        arr = np.arange(12, dtype=np.float64).reshape(3, 4)
+        v = cnp.to_vector(arr)
+        assert type(v) == cppyy.gbl.std.vector['double']
+        assert len(v) == 12
+        assert list(v) == list(range(12))
+
+        assert len(cnp.to_vector(np.array([], dtype=np.int32))) == 0
+
+      # empty containers may have no data at all
+        for tp, dt in (('float', np.float32), ('long long', np.longlong)):
+            for copy in (False, True):
+                e = cnp.asarray(cppyy.gbl.std.vector[tp](), copy=copy)
+                assert e.shape == (0,)
+                assert e.dtype == dt
+        assert len(cnp.to_vector(cnp.asarray(cppyy.gbl.std.vector['double']()))) == 0
+        with raises(TypeError):
+            cnp.to_vector(np.array(['a', 'b']))
+
+
+    def test17_vectorize(self):
+        """Elementwise application of C++ functions to numpy arrays"""
+
+        import cppyy
+
+        try:
+            import numpy as np
+        except ImportError:
+            skip('numpy is not installed')
+
+        cppyy.cppdef("""\
+        namespace Vectorize {
+            double calc(double d) { return d*42.; }
+            int    add(int i, int j) { return i+j; }
+            double add(double d, double e) { return d+e+0.5; }
+            struct Scaler {
+                double fScale;
+                double scale(double d) const { return fScale*d; }
+            };
+        }""")
+
+        ns = cppyy.gbl.Vectorize
+
+        calc = cppyy.vectorize(ns.calc)
+        a = np.linspace(0., 1., 11)
+        assert np.allclose(calc(a), a*42.)
+        assert calc(2.) == 84.
+
+      # overload selection by dtype and broadcasting
+        add = cppyy.vectorize(ns.add)
+        i = np.arange(3, dtype=np.int32).reshape(3, 1)
+        j = np.arange(4, dtype=np.int32)
+        r = add(i, j)
+        assert r.shape == (3, 4)
+        assert r.dtype == np.int32
+        assert (r == i+j).all()
+        assert np.allclose(add(i.astype(np.float64), j.astype(np.float64)), i+j+0.5)
+
+      # output argument, including strided
+        out = np.zeros((3, 8))
+        res = add(i.astype(np.float64), j.astype(np.float64), out=out[:, ::2])
+        assert res.base is out
+        assert np.allclose(out[:, ::2], i+j+0.5)
+        assert (out[:, 1::2] == 0.).all()
+
+        with raises(ValueError):
+            add(i, j, out=np.zeros((2, 2)))
+
+      # bound methods
+        s = ns.Scaler(); s.fScale = 3.
+        assert np.allclose(cppyy.vectorize(s.scale)(a), 3.*a)
+
+        with raises(TypeError):
+            calc(np.array(['a', 'b']))
+
 
 class TestMULTIDIMARRAYS:
     def setup_class(cls):
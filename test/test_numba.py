@@ -460,6 +460,16 @@ class TestNUMBA:
         assert b.value == z + k
         assert c.value == y + k
 
+      # pointers bind to references in JITed calls as well
+        @numba.njit()
+        def swap(d):
+            d.swap_ref(d.b, d.c)
+
+        swap(d)
+
+        assert b.value == y + k
+        assert c.value == z + k
+
     def test12_std_vector_pass_by_ref(self):
         """Numba-JITing of a method that performs scalar addition to a std::vector initialised through pointers """
         import cppyy
@@ -715,6 +725,349 @@ class TestNUMBA:
         result = mul_njit(vector, 5)
         assert(result == matrix2)
 
+    def test15_std_vector_zero_copy(self):
+        """Numba-JITing of calls passing arrays as std::vector or pointer without copies"""
+
+        import cppyy
+        import numba
+        import numpy as np
+
+        cppyy.cppdef("""\
+        namespace ZeroCopy {
+        double vsum(const std::vector<double>& v) {
+            double s = 0.;
+            for (auto d : v) s += d;
+            return s;
+        }
+        double psum(const double* d, long n) {
+            double s = 0.;
+            for (long i = 0; i < n; ++i) s += d[i];
+            return s;
+        }
+        void scale(double* d, long n, double f) {
+            for (long i = 0; i < n; ++i) d[i] *= f;
+        }
+        struct Holder {
+            std::vector<long> v;
+            std::vector<long>* pv = &v;
+        };
+        Holder make_holder() { Holder h; h.v.push_back(3); return h; } }""")
+
+        ns = cppyy.gbl.ZeroCopy
+
+        @numba.njit()
+        def sums(a):
+            return ns.vsum(a), ns.psum(a, a.shape[0])
+
+        a = np.arange(10, dtype=np.float64)
+        assert sums(a) == (45., 45.)
+
+        @numba.njit()
+        def scale(a, f):
+            ns.scale(a, a.shape[0], f)
+
+        scale(a, 2.)
+        assert (a == 2*np.arange(10, dtype=np.float64)).all()
+
+        h = ns.Holder()
+        for i in range(5):
+            h.v.push_back(i)
+
+        @numba.njit()
+        def members(h):
+            total = 0
+            for i in range(len(h.v)):
+                total += h.v[i] + h.pv[i]
+            return total, len(h.v)
+
+        assert members(h) == (20, 5)
+
+        @numba.njit()
+        def modify(h):
+            h.v[0] = 42
+
+        modify(h)
+        assert h.v[0] == 42
+
+      # views require the object in place and the expected layout of std::vector
+        @numba.njit()
+        def copied():
+            return ns.make_holder().v[0]
+
+        with raises(numba.core.errors.TypingError):
+            copied()
+
+        import cppyy.numba_ext as nbe
+        layout, nbe._vector_layout = nbe._vector_layout, False
+        try:
+            @numba.njit()
+            def first(h):
+                return h.v[0]
+
+            with raises(numba.core.errors.TypingError):
+                first(h)
+        finally:
+            nbe._vector_layout = layout
+
+    def test16_many_classes(self):
+        """Numba-JITing of a trace using many C++ classes refreshes typing once"""
+
+        import cppyy, sys
+        import cppyy.numba_ext as nbe
+        import numba
+        import numba.core.registry as nb_reg
+
+        N = 12
+        cppyy.cppdef("namespace ManyClasses {\n%s }" % '\n'.join(
+            "struct C%d { int fData = %d; int get() const { return fData; } };" % (i, i) for i in range(N)))
+
+        ns = cppyy.gbl.ManyClasses
+        objs = [getattr(ns, 'C%d' % i)() for i in range(N)]
+
+      # Numba refreshes the typing context itself as well, so count only the
+      # refreshes done by cppyy
+        typing_context = nb_reg.cpu_target.typing_context
+        orig_refresh = typing_context.refresh
+        refreshes = list()
+        def refresh():
+            if sys._getframe(1).f_globals['__name__'] == nbe.__name__:
+                refreshes.append(1)
+            orig_refresh()
+        typing_context.refresh = refresh
+
+        try:
+            @numba.njit()
+            def total(c0, c1, c2, c3, c4, c5, c6, c7, c8, c9, c10, c11):
+                return c0.get() + c1.fData + c2.get() + c3.fData + c4.get() + c5.fData + \
+                       c6.get() + c7.fData + c8.get() + c9.fData + c10.get() + c11.fData
+
+            assert total(*objs) == sum(range(N))
+        finally:
+            typing_context.refresh = orig_refresh
+
+      # a single refresh for all new types (instead of one per class)
+        assert len(refreshes) == 1
+
+      # reflection is collected once per class and shared across qualifiers
+        for obj in objs:
+            info = nbe.scope_info(type(obj))
+            assert info is nbe.scope_info(type(obj))
+            assert [dmi.f_name for dmi in info.data_members] == ['fData']
+
+    def test17_cache(self):
+        """Numba-JITed traces that use C++ can be cached on disk"""
+
+        import cppyy
+        import numba
+        import pickle
+        import warnings
+
+        cppyy.cppdef("""\
+        namespace CachedTrace {
+        struct Data { int fData = 3; int get() const { return fData; } };
+        double scale(double d, int i) { return d*i; }
+        }""")
+
+        ns = cppyy.gbl.CachedTrace
+        d = ns.Data()
+
+      # the Numba types of C++ classes and functions are rebuilt from their names
+        for obj in (d, ns.Data, ns.scale):
+            nbtype = numba.typeof(obj)
+            assert pickle.loads(pickle.dumps(nbtype)) is nbtype
+
+      # C++ functions can be called through globals and be passed as arguments
+        def kernel(f, d, x):
+            return f(x, d.get()) + cppyy.gbl.CachedTrace.scale(x, 1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', numba.NumbaWarning)
+            assert numba.njit(cache=True)(kernel)(ns.scale, d, 2.) == 8.
+
+      # a new dispatcher loads the compiled trace from the cache, with the C++
+      # function addresses resolved by name at load time
+        reloaded = numba.njit(cache=True)(kernel)
+        assert reloaded(ns.scale, d, 2.) == 8.
+        assert reloaded.stats.cache_hits
+
+      # constructors are named as in C++, so that they can be resolved
+        from cppyy._trampoline import _func_cpp_name
+        from cppyy.numba_ext import resolve_function
+        assert _func_cpp_name(ns.Data.__init__) == 'CachedTrace::Data::Data'
+        assert resolve_function('CachedTrace::Data::Data').__doc__ == ns.Data.__init__.__doc__
+        assert resolve_function('CachedTrace::scale').__doc__ == ns.scale.__doc__
+
+    def test18_overload_ranking(self):
+        """Numba-JITing selects the best matching C++ overload"""
+
+        import cppyy
+        import numba
+
+        cppyy.cppdef("""\
+        namespace Ranking {
+        int pick(int) { return 1; }
+        int pick(double) { return 2; }
+        int pick(float) { return 3; }
+        int pick(const char*) { return 4; }
+
+        size_t twice(size_t n) { return 2*n; }
+        int64_t add(const int64_t& a, long b) { return a+b; }
+
+        double scale(double d, double f = 3., int n = 2) { return n*f*d; }
+        int either(int, double) { return 1; }
+        int either(double, int) { return 2; }
+        }""")
+
+        @numba.njit()
+        def picks(i, d):
+            return cppyy.gbl.Ranking.pick(i), cppyy.gbl.Ranking.pick(d), \
+                   cppyy.gbl.Ranking.pick(42), cppyy.gbl.Ranking.pick(numba.float32(d))
+
+        assert picks(7, 3.14) == (1, 2, 1, 3)
+
+      # typedefs, conversions of (literal) arguments, and const references
+        @numba.njit()
+        def convert(i):
+            return cppyy.gbl.Ranking.twice(i) + cppyy.gbl.Ranking.twice(3), \
+                   cppyy.gbl.Ranking.add(i, 5)
+
+        assert convert(21) == (48, 26)
+
+      # defaulted parameters
+        @numba.njit()
+        def scale(d):
+            return cppyy.gbl.Ranking.scale(d), cppyy.gbl.Ranking.scale(d, 2.), \
+                   cppyy.gbl.Ranking.scale(d, 2., 1)
+
+        assert scale(1.5) == (9., 6., 3.)
+
+      # ties in rank are ambiguous, as in C++
+        @numba.njit()
+        def either(i, j):
+            return cppyy.gbl.Ranking.either(i, j)
+
+        assert either(1, 2.) == 1
+        assert either(1., 2) == 2
+        with raises(numba.core.errors.TypingError):
+            either(1, 2)
+
+    def test19_record_arrays(self):
+        """Numba-JITing of const methods on arrays of C++ aggregates in prange loops"""
+
+        import cppyy
+        import cppyy.numba_ext as nbe
+        import numba
+        import numpy as np
+
+        cppyy.cppdef("""\
+        namespace RecordArrays {
+        struct Point {
+            double x, y;
+            double norm2() const { return x*x + y*y; }
+            double scaled(double f) const { return f*(x + y); }
+            void reset() { x = y = 0.; }
+        };
+
+        double dot(const Point& a, const Point& b) { return a.x*b.x + a.y*b.y; }
+        void reset(Point& p) { p.x = p.y = 0.; }
+
+        std::vector<Point> make_points(int n) {
+            std::vector<Point> v;
+            for (int i = 0; i < n; ++i) v.push_back({0.5*i, 1.-i});
+            return v;
+        } }""")
+
+        ns = cppyy.gbl.RecordArrays
+
+        @numba.njit(parallel=True)
+        def total(pts):
+            s = 0.
+            for i in numba.prange(len(pts)):
+                s += pts[i].norm2() + pts[i].scaled(2.) + \
+                     cppyy.gbl.RecordArrays.dot(pts[i], pts[0]) + pts[i].x
+            return s
+
+        def expected(pts):
+            x, y = pts['x'], pts['y']
+            return float(np.sum(x*x + y*y + 2.*(x + y) + x*x[0] + y*y[0] + x))
+
+      # std::vector of aggregates, viewed in place
+        v = ns.make_points(1000)
+        points = nbe.record_array(v)
+        assert points.dtype.names == ('x', 'y')
+        assert len(points) == len(v)
+        assert math.isclose(total(points), expected(points))
+        assert points['y'][3] == v[3].y
+
+        points['x'][3] = 42.
+        assert v[3].x == 42.
+
+      # views on fields are arrays of numbers
+        @numba.njit()
+        def first(x):
+            return x[0]
+
+        assert points['x'].cppclass is None
+        assert first(points['x']) == points['x'][0]
+        assert first(points['y'][1:]) == v[1].y
+
+      # NumPy structured arrays with the layout of the C++ aggregate
+        arr = np.zeros(100, dtype=nbe.record_dtype(ns.Point))
+        arr['x'] = np.arange(100)
+        arr['y'] = 1.
+        assert math.isclose(total(nbe.record_array(arr, ns.Point)), expected(arr))
+
+        with raises(TypeError):
+            nbe.record_array(np.zeros(10), ns.Point)
+
+      # non-const methods are not available on records
+        @numba.njit()
+        def reset(pts):
+            pts[0].reset()
+
+        with raises(numba.core.errors.TypingError):
+            reset(points)
+
+      # nor can records be passed as non-const references
+        @numba.njit()
+        def reset_ref(pts):
+            cppyy.gbl.RecordArrays.reset(pts[0])
+
+        with raises(numba.core.errors.TypingError):
+            reset_ref(points)
+
+    def test20_cache_across_processes(self):
+        """Numba-JITed traces that use C++ are loaded from the cache by another process"""
+
+        import shutil, subprocess, sys, tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+          # caching requires the kernel to live in a source file
+            with open(os.path.join(tmpdir, 'cached_kernel.py'), 'w') as f:
+                f.write("""\
+import cppyy, numba
+cppyy.cppdef(\"\"\"namespace CachedKernel {
+    double scale(double d, int i) { return d*i; }
+} \"\"\")
+import cppyy.numba_ext
+
+@numba.njit(cache=True)
+def kernel(f, x, i):
+    return f(x, i) + cppyy.gbl.CachedKernel.scale(x, 1)
+
+print(kernel(cppyy.gbl.CachedKernel.scale, 2., 3), sum(kernel.stats.cache_hits.values()))
+""")
+
+            def run():
+                return subprocess.check_output([sys.executable, 'cached_kernel.py'], cwd=tmpdir,
+                    env=dict(os.environ, NUMBA_CACHE_DIR=os.path.join(tmpdir, 'cache'))).split()
+
+            assert run() == [b'8.0', b'0']      # compiled and stored
+            assert run() == [b'8.0', b'1']      # loaded, addresses resolved by name
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 @mark.skipif(has_numba == False, reason="numba not found")
 class TestNUMBA_DOC:
@@ -371,3 +371,70 @@ class TestOVERLOADS:
         # though implicit construction of the test class is forbidden.
         assert cppyy.gbl.test12_foo(1) == cppyy.gbl.call_test12_foo()
         assert cppyy.gbl.test12_bar(1) == cppyy.gbl.call_test12_bar()
+
+    def test13_dispatch_cache(self):
+        """Memoized overload resolution and pinning on argument types"""
+
+        import cppyy
+        from cppyy.types import DispatchCache
+
+        cppyy.cppdef("""
+        namespace Test13 {
+        struct Data { int fI = 42; };
+        std::string f(int)                { return "int"; }
+        std::string f(double)             { return "double"; }
+        std::string f(const std::string&) { return "string"; }
+        std::string f(const Data&)        { return "Data"; }
+        std::string f(int, int)           { return "int, int"; }
+        std::string f(long, double)       { return "long, double"; }
+        std::string f(long long, double)  { return "long long, double"; }
+        }""")
+
+        ns = cppyy.gbl.Test13
+
+        f = DispatchCache(ns.f)
+        for i in range(3):
+            assert f(1) == "int"
+            assert f(1.) == "double"
+            assert f("aap") == "string"
+            assert f(ns.Data()) == "Data"
+            assert f(1, 2) == "int, int"
+            assert f(1, 2.) in ("long, double", "long long, double")
+
+        stats = f.stats()
+        assert stats['misses'] == 6
+        assert stats['hits']   == 12
+        assert stats['size']   == 6
+        assert stats['pinned'] == 5     # (int, float) is ambiguous
+
+        pinned = f.pin(1.)
+        assert pinned is not ns.f
+        assert pinned(1) == "double"    # no overload resolution
+        assert f.pin(1, 2.) is f.__func__
+
+        f = DispatchCache(ns.f, maxsize=2)
+        f(1); f(1.); f("aap")
+        assert f.stats()['evictions'] == 1
+        assert f.stats()['size'] == 2
+
+      # overloads selected by value are not pinned on type alone
+        cppyy.cppdef("""
+        namespace Test13 {
+        std::string g(unsigned int) { return "unsigned int"; }
+        std::string g(double)       { return "double"; }
+        std::string h(Data*)        { return "Data*"; }
+        }""")
+
+        g = DispatchCache(ns.g)
+        for i in range(2):
+            assert g(1) == "unsigned int"
+            assert g(-1) == "double"
+            assert g(2**40) == "double"
+        assert g.pin(1) is not g.__func__
+        assert g.pin(-1) is g.__func__
+        assert g.pin(2**40) is g.__func__
+
+        h = DispatchCache(ns.h)
+        assert h(ns.Data()) == "Data*"
+        assert h(cppyy.nullptr) == "Data*"
+        assert h.pin(cppyy.nullptr) is h.__func__
@@ -1381,3 +1381,41 @@ class TestREGRESSION:
         with raises(cppyy.gbl.std.logic_error):
             foo.bar()
 
+
+    def test47_layout_from_reflection(self):
+        """sizeof, alignof, and offsetof, also for lists of types and members"""
+
+        import cppyy, ctypes
+
+        cppyy.cppdef("""\
+        namespace test47_layout {
+        struct Record { char tag; double value; int16_t flags[3]; };
+        size_t sz = sizeof(Record), al = alignof(Record);
+        size_t offs[] = {offsetof(Record, tag), offsetof(Record, value), offsetof(Record, flags)};
+        }""")
+
+        ns = cppyy.gbl.test47_layout
+
+        assert cppyy.sizeof(ns.Record) == ns.sz
+        assert cppyy.sizeof('test47_layout::Record') == ns.sz
+        assert cppyy.alignof(ns.Record) == ns.al
+        assert cppyy.alignof(ctypes.c_double) == ctypes.alignment(ctypes.c_double)
+
+        assert cppyy.offsetof(ns.Record, 'value') == ns.offs[1]
+        assert cppyy.offsetof(ns.Record, ['tag', 'value', 'flags']) == list(ns.offs)
+        assert cppyy.offsetof('test47_layout::Record', 'flags') == ns.offs[2]
+
+        assert cppyy.sizeof([ns.Record, 'int16_t', ctypes.c_int]) == [ns.sz, 2, ctypes.sizeof(ctypes.c_int)]
+        assert cppyy.alignof(['int16_t', ns.Record, 'long double']) == \
+            [2, ns.al, cppyy.gbl.gInterpreter.ProcessLine('alignof(long double);')]
+
+        with raises(AttributeError):
+            cppyy.offsetof(ns.Record, 'no_such_member')
+        with raises(AttributeError):
+            cppyy.offsetof('test47_layout::Record', 'no_such_member')
+
+        with raises(TypeError):
+            cppyy.alignof('test47_layout::NoSuchType')
+        with raises(TypeError):
+            cppyy.alignof(['test47_layout::NoSuchType', 'int16_t', 'long double'])
+        assert cppyy.alignof(['int16_t', 'long double'])[0] == 2
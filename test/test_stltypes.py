@@ -820,6 +820,52 @@ class TestSTLVECTOR:
             for i, d in zip(range(-5, 5, 1), data):
                 assert d == i
 
+    def test25_iadd_from_buffer(self):
+        """Bulk += from objects that support the buffer protocol"""
+
+        import cppyy, array
+
+        vector = cppyy.gbl.std.vector
+
+        v = vector['double']()
+        v += array.array('d', [1., 2., 3.])
+        assert list(v) == [1., 2., 3.]
+
+        v += v
+        assert list(v) == [1., 2., 3., 1., 2., 3.]
+
+        v2 = vector['double']([4., 5.])
+        v += v2
+        assert list(v)[-3:] == [3., 4., 5.]
+
+      # mismatched types fall back to element-wise conversion
+        vi = vector['int']([1])
+        vi += array.array('h', [2, 3])
+        assert list(vi) == [1, 2, 3]
+
+      # incompatible elements are rejected without growing the vector
+        raises(TypeError, vi.__iadd__, array.array('d', [4.5]))
+        assert list(vi) == [1, 2, 3]
+
+        vb = vector['uint8_t']()
+        vb += b'\x01\x02\x03'
+        assert list(map(ord, vb)) == [1, 2, 3]      # uint8_t is unsigned char
+
+        try:
+            import numpy as np
+        except ImportError:
+            return
+
+        N = 1000
+        vd = vector['double']()
+        vd += np.arange(N, dtype=np.float64)
+        assert len(vd) == N
+        assert vd[N-1] == N-1.
+
+      # non-contiguous arrays are copied element-wise
+        vd += np.arange(10, dtype=np.float64)[::2]
+        assert list(vd)[N:] == [0., 2., 4., 6., 8.]
+
 
 class TestSTLSTRING:
     def setup_class(cls):
@@ -1955,6 +2001,53 @@ class TestSTLTUPLE:
         assert s1.fInt == 42
         assert s2.fInt == 42
 
+    def test05_tuple_element_types(self):
+        """Direct access to tuple elements of various types"""
+
+        import cppyy
+        std = cppyy.gbl.std
+
+        cppyy.cppdef("""\
+        namespace TupleElements {
+        struct Point { Point(int x, int y) : fX(x), fY(y) {} int fX, fY; };
+        int gInt = 17;
+
+        std::tuple<short, unsigned long, float, double, bool, Point, std::string, int*>
+        make() {
+            return std::make_tuple(short(-1), 42ul, 3.5f, 2.25, true, Point(3, 4), "aap", &gInt);
+        } }""")
+
+        ns = cppyy.gbl.TupleElements
+
+        t = ns.make()
+        assert len(t) == 8
+        assert t[0] == -1
+        assert t[1] == 42
+        assert t[2] == 3.5
+        assert t[3] == 2.25
+        assert t[4] is True
+        assert t[5].fX == 3 and t[5].fY == 4
+        assert t[6] == "aap"
+
+      # non-builtin elements are returned as from std::get<>
+        for i in (5, 6, 7):
+            assert type(t[i]) is type(std.get[i](t))
+
+      # which returns class elements by reference
+        t[5].fX = 5
+        assert t[5].fX == 5
+        assert t[-3].fY == 4
+
+        with raises(IndexError):
+            t[8]
+
+        s, ul, f, d, b, p, st, ip = ns.make()
+        assert s == -1 and ul == 42 and f == 3.5 and d == 2.25 and b
+        assert p.fX == 3 and p.fY == 4
+        assert st == "aap"
+
+        assert list(std.make_tuple(1, 2.))  == [1, 2.]
+
 
 class TestSTLPAIR:
     def setup_class(cls):
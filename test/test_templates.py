@@ -1,6 +1,6 @@
 import py
-from pytest import raises
-from .support import setup_make, pylong
+from pytest import raises, skip
+from .support import setup_make, pylong, ispypy
 
 currpath = py.path.local(__file__).dirpath()
 test_dct = str(currpath.join("templatesDict"))
@@ -1163,6 +1163,60 @@ class TestTEMPLATES:
         assert ns.stringify["const char*"]("Aap")                    == "Aap "
         assert ns.stringify(ctypes.c_char_p(bytes("Noot", "ascii"))) == "Noot "
 
+    def test35_template_manifest(self):
+        """Record and replay class template instantiations"""
+
+        if ispypy:
+            skip('template manifests are only available on CPython')
+
+        import cppyy, os, tempfile
+
+        cppyy.cppdef("""\
+        namespace TemplateManifest {
+        template<typename T, typename U>
+        struct Pair { T first; U second; };
+        }""")
+
+        ns = cppyy.gbl.TemplateManifest
+        p1 = ns.Pair['int', 'double']
+        p2 = ns.Pair[float, str]            # Python types: saved as C++ spellings
+
+        fd, fname = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+        try:
+            cppyy.save_template_manifest(fname)
+            with open(fname) as f:
+                lines = f.readlines()
+            assert 'TemplateManifest::Pair\tint,double\n' in lines
+            entries = [l.rstrip('\n').split('\t') for l in lines if l[0] != '#']
+            p2args = [args for name, args in entries
+                          if name == 'TemplateManifest::Pair' and args.startswith('float,')]
+            assert len(p2args) == 1
+            assert ns.Pair[p2args[0]] is p2
+
+          # replay is cheap here, as the actual instantiations are already done
+            assert 1 <= cppyy.load_template_manifest(fname)
+
+            worker = cppyy.load_template_manifest(fname, background=True)
+            worker.join()
+            assert ns.Pair[int, 'double'] is p1
+        finally:
+            os.remove(fname)
+
+    def test36_equivalent_argument_spellings(self):
+        """Equivalent template argument spellings resolve to the same class"""
+
+        import cppyy
+
+        v1 = cppyy.gbl.std.vector[int]
+        for spelling in ['int', 'int ', ' int', cppyy.gbl.int]:
+            assert cppyy.gbl.std.vector[spelling] is v1
+
+        m1 = cppyy.gbl.std.map['std::string', 'unsigned int']
+        assert cppyy.gbl.std.map['std::string ', 'unsigned  int'] is m1
+        assert cppyy.gbl.std.map['std::string,unsigned int'] is m1
+        assert cppyy.gbl.std.map[cppyy.gbl.std.string, 'unsigned int'] is m1
+
 
 class TestTEMPLATED_TYPEDEFS:
     def setup_class(cls):